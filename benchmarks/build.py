@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+Benchmark ``generator.build`` on synthetic sites.
+
+Every size is built three times:
+
+    - cold: without output and build cache
+    - noop: nothing changed
+    - touch: one post changed
+
+The timings are appended to a json lines file, one line for a build,
+with the commit of the checkout, so that results can be compared
+between commits.
+
+Usage:
+    build.py [options] [<posts>...]
+
+Options:
+    -h --help               show this screen.
+    --tags=<n>              number of tags per post [default: 3].
+    --codes=<n>             number of code blocks per post [default: 1].
+    --categories=<n>        number of categories [default: 5].
+    --pages=<n>             number of pages [default: 5].
+    -j --jobs=<n>           number of processes [default: 1].
+    -o --output=<file>      results file [default: benchmarks/results.jsonl].
+    --keep                  keep the generated sites.
+
+:copyright: (c) 2012 by Hsiaoming Yang (aka lepture)
+:license: BSD
+'''
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import tempfile
+import subprocess
+import multiprocessing
+
+ROOT = os.path.abspath(os.path.dirname(__file__))
+#: benchmark the checkout, not the installed version
+sys.path.insert(0, os.path.dirname(ROOT))
+
+from corpus import generate
+
+
+def _build(directory, settings, jobs, queue):
+    from liquidluck.options import g
+    from liquidluck.generator import build
+    from liquidluck.profiler import Profiler
+
+    os.chdir(directory)
+    logging.getLogger().setLevel(logging.WARN)
+    g.profiler = Profiler()
+    start = time.time()
+    build(settings, jobs=jobs)
+    total = time.time() - start
+    queue.put((total, g.profiler.report()))
+
+
+def run_build(directory, settings, jobs):
+    """Build in a child process, every build starts with clean globals."""
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=_build, args=(directory, settings, jobs, queue)
+    )
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def total_of(report, category):
+    return round(sum(o['wall'] for o in report.get(category, [])), 6)
+
+
+def stages_of(report):
+    return dict((o['name'], o['wall']) for o in report.get('stage', []))
+
+
+def git_commit():
+    try:
+        return subprocess.Popen(
+            ['git', 'rev-parse', 'HEAD'], cwd=ROOT, stdout=subprocess.PIPE
+        ).communicate()[0].strip().decode('utf-8')
+    except OSError:
+        return None
+
+
+def benchmark(posts, tags, codes, categories, pages, jobs):
+    directory = tempfile.mkdtemp(prefix='liquidluck-benchmark-')
+    settings = generate(directory, posts, tags, codes, categories, pages)
+
+    def touch():
+        content = os.path.join(directory, 'content')
+        for root, dirs, files in os.walk(content):
+            for name in files:
+                if name.startswith('post-'):
+                    f = open(os.path.join(root, name), 'a')
+                    f.write('\nchanged\n')
+                    f.close()
+                    return
+
+    scenarios = [('cold', None), ('noop', None), ('touch', touch)]
+    results = []
+    for scenario, prepare in scenarios:
+        if prepare:
+            prepare()
+        total, report = run_build(directory, settings, jobs)
+        stages = stages_of(report)
+        results.append({
+            'scenario': scenario,
+            'posts': posts,
+            'tags': tags,
+            'codes': codes,
+            'categories': categories,
+            'pages': pages,
+            'jobs': jobs,
+            'total': round(total, 6),
+            'parse': stages.get('parse', 0),
+            'render': total_of(report, 'template'),
+            'write': total_of(report, 'disk'),
+            'stages': stages,
+        })
+    return directory, results
+
+
+def main():
+    from docopt import docopt
+    args = docopt(__doc__)
+
+    sizes = [int(o) for o in args['<posts>']] or [100, 1000]
+    commit = git_commit()
+    output = open(args['--output'], 'a')
+    print('%8s %8s %10s %10s %10s %10s' % (
+        'posts', 'scenario', 'total', 'parse', 'render', 'write'))
+    for posts in sizes:
+        directory, results = benchmark(
+            posts,
+            int(args['--tags']),
+            int(args['--codes']),
+            int(args['--categories']),
+            int(args['--pages']),
+            int(args['--jobs']),
+        )
+        for result in results:
+            result['commit'] = commit
+            result['python'] = sys.version.split()[0]
+            result['time'] = int(time.time())
+            output.write(json.dumps(result, sort_keys=True) + '\n')
+            print('%8d %8s %9.3fs %9.3fs %9.3fs %9.3fs' % (
+                posts, result['scenario'], result['total'],
+                result['parse'], result['render'], result['write'],
+            ))
+        if args['--keep']:
+            print('site is kept in %s' % directory)
+        else:
+            shutil.rmtree(directory)
+    output.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+Generate a synthetic site for benchmarks.
+
+Usage:
+    corpus.py <directory> [options]
+
+Options:
+    -h --help               show this screen.
+    --posts=<n>             number of posts [default: 100].
+    --tags=<n>              number of tags per post [default: 3].
+    --codes=<n>             number of code blocks per post [default: 1].
+    --categories=<n>        number of categories [default: 5].
+    --pages=<n>             number of pages [default: 5].
+    --seed=<n>              random seed [default: 0].
+
+:copyright: (c) 2012 by Hsiaoming Yang (aka lepture)
+:license: BSD
+'''
+
+import os
+import random
+import datetime
+
+WORDS = (
+    'lorem ipsum dolor sit amet consectetur adipisicing elit sed do eiusmod '
+    'tempor incididunt ut labore et dolore magna aliqua enim ad minim veniam '
+    'quis nostrud exercitation ullamco laboris nisi aliquip ex ea commodo '
+    'consequat duis aute irure in reprehenderit voluptate velit esse cillum '
+    'fugiat nulla pariatur excepteur sint occaecat cupidatat non proident '
+    'sunt culpa qui officia deserunt mollit anim id est laborum'
+).split()
+
+CODE = '''```python
+def fibonacci(n):
+    """fibonacci number %(index)d"""
+    a, b = 0, 1
+    for i in range(n):
+        a, b = b, a + b
+    return a
+```'''
+
+SETTINGS = '''# -*- coding: utf-8 -*-
+
+site = {
+    "name": "Benchmark",
+    "url": "http://localhost/",
+}
+
+config = {
+    "source": "content",
+    "output": "deploy",
+    "static": "deploy/static",
+    "permalink": "{{date.year}}/{{filename}}.html",
+    "perpage": 30,
+    "feedcount": 20,
+}
+
+writer = {
+    "active": [
+        "liquidluck.writers.core.PostWriter",
+        "liquidluck.writers.core.PageWriter",
+        "liquidluck.writers.core.ArchiveWriter",
+        "liquidluck.writers.core.ArchiveFeedWriter",
+        "liquidluck.writers.core.FileWriter",
+        "liquidluck.writers.core.StaticWriter",
+        "liquidluck.writers.core.YearWriter",
+        "liquidluck.writers.core.CategoryWriter",
+        "liquidluck.writers.core.CategoryFeedWriter",
+        "liquidluck.writers.core.TagWriter",
+        "liquidluck.writers.core.TagCloudWriter",
+    ],
+}
+'''
+
+
+def sentence(rand, count=12):
+    words = [rand.choice(WORDS) for i in range(count)]
+    return ' '.join(words).capitalize() + '.'
+
+
+def paragraph(rand, count=5):
+    return ' '.join(sentence(rand) for i in range(count))
+
+
+def write_file(filepath, content):
+    f = open(filepath, 'w')
+    f.write(content)
+    f.close()
+
+
+def create_post(rand, index, date, tags, category, codes):
+    lines = [
+        '# %s %d' % (sentence(rand, 4).rstrip('.'), index),
+        '',
+        '- date: %s' % date.strftime('%Y-%m-%d %H:%M'),
+        '- category: %s' % category,
+        '- tags: %s' % ', '.join(tags),
+        '',
+        '-----',
+        '',
+    ]
+    for i in range(codes + 2):
+        lines.append('## %s' % sentence(rand, 3).rstrip('.'))
+        lines.append('')
+        lines.append(paragraph(rand))
+        lines.append('')
+        if i < codes:
+            lines.append(CODE % {'index': i})
+            lines.append('')
+    return '\n'.join(lines)
+
+
+def create_page(rand, index):
+    lines = [
+        '# Page %d' % index,
+        '',
+        '-----',
+        '',
+        paragraph(rand),
+        '',
+    ]
+    return '\n'.join(lines)
+
+
+def generate(directory, posts=100, tags=3, codes=1, categories=5, pages=5,
+             seed=0):
+    """Generate a site in ``directory``, returns the path of settings."""
+    rand = random.Random(seed)
+    content = os.path.join(directory, 'content')
+    if not os.path.isdir(content):
+        os.makedirs(content)
+
+    #: the tag pool grows with the site, like a real blog
+    tag_pool = ['tag%d' % i for i in range(max(tags, int(posts ** 0.5)))]
+    category_pool = ['category%d' % i for i in range(max(categories, 1))]
+    start = datetime.datetime(2008, 1, 1)
+
+    for index in range(posts):
+        date = start + datetime.timedelta(hours=index * 7)
+        text = create_post(
+            rand, index, date,
+            rand.sample(tag_pool, min(tags, len(tag_pool))),
+            rand.choice(category_pool), codes,
+        )
+        folder = os.path.join(content, str(date.year))
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+        write_file(os.path.join(folder, 'post-%d.md' % index), text)
+
+    for index in range(pages):
+        text = create_page(rand, index)
+        write_file(os.path.join(content, 'page-%d.md' % index), text)
+
+    settings = os.path.join(directory, 'settings.py')
+    write_file(settings, SETTINGS)
+    return settings
+
+
+def main():
+    from docopt import docopt
+    args = docopt(__doc__)
+    generate(
+        args['<directory>'],
+        posts=int(args['--posts']),
+        tags=int(args['--tags']),
+        codes=int(args['--codes']),
+        categories=int(args['--categories']),
+        pages=int(args['--pages']),
+        seed=int(args['--seed']),
+    )
+
+
+if __name__ == '__main__':
+    main()
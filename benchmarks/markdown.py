@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+Micro benchmark of the per-document overhead of the markdown reader.
+
+Compare a converter created for every document (with the transforms
+imported again) against the shared converter of ``markdown()``.
+
+Usage:
+    markdown.py [options]
+
+Options:
+    -h --help               show this screen.
+    -n --number=<n>         number of documents [default: 2000].
+
+:copyright: (c) 2012 by Hsiaoming Yang (aka lepture)
+:license: BSD
+'''
+
+import os
+import sys
+import time
+import random
+import datetime
+
+ROOT = os.path.abspath(os.path.dirname(__file__))
+#: benchmark the checkout, not the installed version
+sys.path.insert(0, os.path.dirname(ROOT))
+
+from corpus import create_post, create_page
+
+DOCUMENTS = [
+    ('tiny', lambda rand: u'hello *world*\n'),
+    ('page', lambda rand: create_page(rand, 0).split('-----', 1)[1]),
+    ('post', lambda rand: create_post(
+        rand, 0, datetime.datetime(2012, 1, 1), ['a', 'b'], 'work', 1
+    ).split('-----', 1)[1]),
+]
+
+
+def fresh(text):
+    from liquidluck.readers import markdown as reader
+    reader._transforms.clear()
+    md = reader.LLMarkdown(extras=['code-friendly', 'fenced-code-blocks',
+        'footnotes', 'toc', 'wiki-tables'])
+    return md.convert(text)
+
+
+def shared(text):
+    from liquidluck.readers.markdown import markdown
+    return markdown(text)
+
+
+def timeit(func, text, number, repeat=3):
+    func(text)
+    best = None
+    for i in range(repeat):
+        start = time.time()
+        for j in range(number):
+            func(text)
+        spent = (time.time() - start) / number
+        if best is None or spent < best:
+            best = spent
+    return best
+
+
+def main():
+    from docopt import docopt
+    args = docopt(__doc__)
+    number = int(args['--number'])
+
+    rand = random.Random(0)
+    print('%8s %12s %12s %12s' % ('document', 'fresh', 'shared', 'overhead'))
+    for name, create in DOCUMENTS:
+        text = create(rand)
+        before = timeit(fresh, text, number)
+        after = timeit(shared, text, number)
+        print('%8s %10.1fus %10.1fus %10.1fus' % (
+            name, before * 1e6, after * 1e6, (before - after) * 1e6
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+Benchmark the memory and the attribute access of posts.
+
+Create posts with the meta data of the synthetic corpus, and access the
+attributes that templates and writers use.
+
+Usage:
+    posts.py [options]
+
+Options:
+    -h --help               show this screen.
+    --posts=<n>             number of posts [default: 50000].
+    --rounds=<n>            rounds of attribute access [default: 5].
+
+:copyright: (c) 2012 by Hsiaoming Yang (aka lepture)
+:license: BSD
+'''
+
+import os
+import sys
+import time
+import random
+import datetime
+import resource
+
+ROOT = os.path.abspath(os.path.dirname(__file__))
+#: benchmark the checkout, not the installed version
+sys.path.insert(0, os.path.dirname(ROOT))
+
+from corpus import sentence
+
+
+def max_rss():
+    #: kilobytes on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def create_posts(count):
+    from liquidluck.readers.base import Post
+
+    rand = random.Random(0)
+    tags = ['tag%d' % i for i in range(int(count ** 0.5))]
+    start = datetime.datetime(2008, 1, 1)
+    posts = []
+    for index in range(count):
+        date = start + datetime.timedelta(hours=index * 7)
+        meta = {
+            'date': date.strftime('%Y-%m-%d %H:%M'),
+            'category': 'category%d' % (index % 5),
+            'tags': ', '.join(rand.sample(tags, 3)),
+        }
+        title = '%s %d' % (sentence(rand, 4).rstrip('.'), index)
+        posts.append(Post('post-%d.md' % index, u'', title=title, meta=meta))
+    return posts
+
+
+def access(posts):
+    for post in posts:
+        post.date.year
+        post.tags
+        post.author.name
+        post.clean_title
+        post.category
+        post.public
+
+
+def main():
+    from docopt import docopt
+    args = docopt(__doc__)
+    count = int(args['--posts'])
+    rounds = int(args['--rounds'])
+
+    rss = max_rss()
+    start = time.time()
+    posts = create_posts(count)
+    created = time.time() - start
+    memory = max_rss() - rss
+
+    start = time.time()
+    access(posts)
+    first = time.time() - start
+
+    start = time.time()
+    for i in range(rounds):
+        access(posts)
+    again = (time.time() - start) / rounds
+    memory_after = max_rss() - rss
+
+    print('posts:          %d' % count)
+    print('create:         %.3fs' % created)
+    print('memory:         %.1f bytes per post' % (memory * 1024.0 / count))
+    print('memory after:   %.1f bytes per post' % (
+        memory_after * 1024.0 / count))
+    print('first access:   %.3fs (%.2fus per post)' % (
+        first, first * 1e6 / count))
+    print('access:         %.3fs (%.2fus per post)' % (
+        again, again * 1e6 / count))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+Benchmark related posts of ``liquidluck.writers.extends.PostWriter``.
+
+Compare the inverted tag index with scanning every post for every post,
+on sites of different sizes. The results of both are checked to be the
+same.
+
+Usage:
+    related.py [options] [<posts>...]
+
+Options:
+    -h --help               show this screen.
+
+:copyright: (c) 2012 by Hsiaoming Yang (aka lepture)
+:license: BSD
+'''
+
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.dirname(__file__))
+#: benchmark the checkout, not the installed version
+sys.path.insert(0, os.path.dirname(ROOT))
+
+from posts import create_posts
+
+
+def scan_related(post, posts):
+    """Related posts by scanning all posts, as it was before the index."""
+    tags = set(post.tags)
+    base = len(tags)
+
+    def get_related_by_tags():
+        for p in posts:
+            prior = len(tags - set(p.tags))
+            if prior < base and p.title != post.title:
+                p.related_priority = base - prior
+                yield p
+
+    related = sorted(get_related_by_tags(),
+                     key=lambda o: o.related_priority,
+                     reverse=True)
+    return related[:4]
+
+
+def main():
+    from docopt import docopt
+    from liquidluck.options import g
+    from liquidluck.writers.extends import PostWriter
+
+    args = docopt(__doc__)
+    sizes = [int(o) for o in args['<posts>']] or [1000, 2000, 4000, 8000]
+
+    print('%8s %10s %10s' % ('posts', 'scan', 'index'))
+    for count in sizes:
+        posts = create_posts(count)
+        posts.sort(key=lambda o: o.date, reverse=True)
+        g.public_posts = posts
+
+        start = time.time()
+        expected = [scan_related(post, posts) for post in posts]
+        scan = time.time() - start
+
+        writer = PostWriter()
+        start = time.time()
+        related = [writer._get_related(post) for post in posts]
+        index = time.time() - start
+
+        assert [[o.post for o in r] for r in related] == expected
+        print('%8d %9.3fs %9.3fs' % (count, scan, index))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,387 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+Build cache, keep parsed posts and rendered pages between builds.
+
+The cache records the content hash of every source file with the post
+parsed from it, and the signature of every page a writer rendered. The
+next build only parses the files that changed, and only renders the pages
+whose signature changed.
+
+A page signature is made of:
+
+    - the settings, the theme files and the metadata of every post
+    - the template name and the params passed to the template
+
+Which means changing the content of a post only re-renders the pages
+that received that post.
+
+The static cache keeps the hash of every static file of the theme that
+``static_url`` referenced, with its size and modified time. A file is only
+hashed again when it is changed.
+
+:copyright: (c) 2012 by Hsiaoming Yang (aka lepture)
+:license: BSD
+'''
+
+import os
+import zlib
+import hashlib
+import logging
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+import liquidluck
+from liquidluck.options import g, settings
+from liquidluck.utils import walk_dir, file_hash, to_unicode, utf8
+from liquidluck.readers.base import Post
+from liquidluck.writers.base import Pagination
+from liquidluck.writers.extends import RelatedPost
+
+
+def stable_repr(value):
+    """repr of settings and meta data, which keeps the same between builds."""
+    if isinstance(value, dict):
+        items = sorted(value.items(), key=lambda o: repr(o[0]))
+        return '{%s}' % ', '.join(
+            '%r: %s' % (k, stable_repr(v)) for k, v in items
+        )
+    if isinstance(value, (list, tuple)):
+        return '[%s]' % ', '.join(stable_repr(v) for v in value)
+    return repr(value)
+
+
+def _dump(data, path):
+    """Pickle ``data`` to a temporary file, then rename it to ``path``,
+    a broken pickle never replaces the last one."""
+    tmp = path + '.tmp'
+    f = open(tmp, 'wb')
+    try:
+        try:
+            pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+        finally:
+            f.close()
+        os.rename(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+class BuildCache(object):
+    filename = 'build.pickle'
+    #: bump it when the pickled objects are changed
+    format = 5
+
+    def __init__(self, directory):
+        #: keep in memory only when directory is None
+        self.directory = directory
+
+        #: records of the last build
+        self._sources = {}
+        self._outputs = {}
+
+        #: records of this build
+        self.sources = {}
+        self.outputs = {}
+
+        self._site_signature = None
+        self._post_signatures = {}
+
+    @property
+    def path(self):
+        return os.path.join(self.directory, self.filename)
+
+    def load(self):
+        if not self.directory or not os.path.exists(self.path):
+            return
+        try:
+            f = open(self.path, 'rb')
+            data = pickle.load(f)
+            f.close()
+        except Exception as e:
+            logging.warn('Build cache is broken: %s' % e)
+            return
+
+        if data.get('version') != liquidluck.__version__:
+            return
+        if data.get('format') != self.format:
+            return
+
+        self._sources = data.get('sources', {})
+        self._outputs = data.get('outputs', {})
+        if data.get('reader') != self.reader_signature():
+            #: readers changed, parse everything again
+            for filepath in self._sources:
+                self._sources[filepath].pop('post', None)
+        logging.debug('Load build cache from %s' % self.path)
+
+    def save(self):
+        if not self.directory:
+            return
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+        data = {
+            'version': liquidluck.__version__,
+            'format': self.format,
+            'reader': self.reader_signature(),
+            'sources': self.sources,
+            'outputs': self.outputs,
+        }
+        _dump(data, self.path)
+        logging.debug('Save build cache to %s' % self.path)
+
+    def reader_signature(self):
+        return stable_repr(settings.reader)
+
+    def source_hash(self, filepath):
+        stat = os.stat(filepath)
+        stat = (stat.st_size, stat.st_mtime)
+        record = self._sources.get(filepath)
+        if record and record['stat'] == stat:
+            return stat, record['hash']
+        return stat, file_hash(filepath)
+
+    def get_post(self, filepath):
+        """Returns ``(True, post)`` if the source is not changed since
+        last build, ``post`` is None for files that no reader supports.
+        """
+        stat, hsh = self.source_hash(filepath)
+        self.sources[filepath] = {'stat': stat, 'hash': hsh}
+
+        record = self._sources.get(filepath)
+        if not record or record['hash'] != hsh or 'post' not in record:
+            return False, None
+        self.sources[filepath]['post'] = record['post']
+        return True, record['post']
+
+    def set_post(self, filepath, post):
+        if filepath not in self.sources:
+            stat, hsh = self.source_hash(filepath)
+            self.sources[filepath] = {'stat': stat, 'hash': hsh}
+        self.sources[filepath]['post'] = post
+
+    def remove_post(self, filepath):
+        self.sources.pop(filepath, None)
+
+    def rotate(self):
+        """Start another build in the same process, the outputs of this
+        build become the records of the last build."""
+        if self.outputs:
+            self._outputs = self.outputs
+            self.outputs = {}
+
+    def reset_signature(self):
+        self._site_signature = None
+        self._post_signatures = {}
+
+    def site_signature(self):
+        if self._site_signature:
+            return self._site_signature
+
+        md5 = hashlib.md5()
+        md5.update(utf8(liquidluck.__version__))
+        md5.update(utf8(to_unicode(stable_repr(settings))))
+
+        themes = [
+            os.path.abspath('_templates'),
+            g.theme_directory,
+            os.path.join(g.liquid_directory, '_themes', 'default'),
+        ]
+        for theme in themes:
+            for filepath in sorted(walk_dir(theme)):
+                stat = os.stat(filepath)
+                md5.update(utf8('%s:%s:%s' % (
+                    filepath, stat.st_size, stat.st_mtime)))
+
+        posts = g.public_posts + g.secure_posts + g.pure_pages
+        for post in posts:
+            meta = dict(post.meta)
+            #: they are part of the content, which may be rendered lazily
+            meta.pop('source_text', None)
+            meta.pop('toc', None)
+            md5.update(utf8(post.filepath))
+            md5.update(utf8(to_unicode(post.title)))
+            md5.update(utf8(to_unicode(stable_repr(meta))))
+
+        for filepath in g.pure_files:
+            md5.update(utf8(filepath))
+
+        self._site_signature = md5.hexdigest()
+        return self._site_signature
+
+    def post_signature(self, post):
+        key = id(post)
+        if key in self._post_signatures:
+            return self._post_signatures[key]
+
+        record = self.sources.get(post.filepath)
+        if record:
+            hsh = record['hash']
+        else:
+            md5 = hashlib.md5()
+            md5.update(utf8(to_unicode(post.title)))
+            md5.update(utf8(to_unicode(stable_repr(post.meta))))
+            md5.update(utf8(to_unicode(post.content)))
+            hsh = md5.hexdigest()
+
+        signature = '%s:%s' % (post.filepath, hsh)
+        self._post_signatures[key] = signature
+        return signature
+
+    def signature(self, template, params):
+        md5 = hashlib.md5()
+        md5.update(utf8(self.site_signature()))
+        md5.update(utf8(template))
+        self._update(md5, params)
+        return md5.hexdigest()
+
+    def _update(self, md5, value, shallow=False):
+        if isinstance(value, Post):
+            md5.update(utf8(self.post_signature(value)))
+            relation = value.relation
+            if relation and not shallow:
+                #: related posts are part of the page, but not their relations
+                self._update(md5, relation, shallow=True)
+        elif isinstance(value, RelatedPost):
+            md5.update(utf8(self.post_signature(value.post)))
+            md5.update(utf8(repr(value.related_priority)))
+        elif isinstance(value, Pagination):
+            md5.update(utf8(to_unicode(stable_repr([
+                value.title, value.root, value.page, value.per_page,
+                value.total,
+            ]))))
+            self._update(md5, value.items)
+        elif isinstance(value, dict):
+            for key in sorted(value.keys(), key=repr):
+                md5.update(utf8(to_unicode(repr(key))))
+                self._update(md5, value[key], shallow)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                self._update(md5, item, shallow)
+        else:
+            #: unknown objects include their id in repr,
+            #: in this case the page is always rendered
+            md5.update(utf8(to_unicode(repr(value))))
+
+    def _output_stat(self, destination):
+        try:
+            stat = os.stat(destination)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime
+
+    def is_fresh(self, destination, signature):
+        if destination in self.outputs:
+            #: another writer has written to this destination in this build
+            return False
+        record = self._outputs.get(destination)
+        if not record or record[0] != signature:
+            return False
+        #: the file may be written by others, e.g. the server
+        stat = self._output_stat(destination)
+        return stat is not None and stat == record[1]
+
+    def set_output(self, destination, signature):
+        self.outputs[destination] = (
+            signature, self._output_stat(destination)
+        )
+
+
+def crc32_hash(filepath):
+    crc = 0
+    f = open(filepath, 'rb')
+    for chunk in iter(lambda: f.read(65536), b''):
+        crc = zlib.crc32(chunk, crc)
+    f.close()
+    return '%08x' % (crc & 0xffffffff)
+
+
+class StaticCache(object):
+    filename = 'static.pickle'
+    methods = {'md5': file_hash, 'crc32': crc32_hash}
+
+    def __init__(self, directory=None, method='md5'):
+        #: keep in memory only when directory is None
+        self.directory = directory
+        if method not in self.methods:
+            logging.warn('Unknown static_hash: %s, use md5' % method)
+            method = 'md5'
+        self.method = method
+
+        #: path -> (size, mtime, method, hash)
+        self.records = {}
+        #: files checked in this build, path -> hash
+        self.checked = {}
+        #: records checked since last ``collect``
+        self._checked = {}
+
+    @property
+    def path(self):
+        return os.path.join(self.directory, self.filename)
+
+    def load(self):
+        if not self.directory or not os.path.exists(self.path):
+            return
+        try:
+            f = open(self.path, 'rb')
+            data = pickle.load(f)
+            f.close()
+        except Exception as e:
+            logging.warn('Static cache is broken: %s' % e)
+            return
+        self.records = data.get('records', {})
+
+    def save(self):
+        if not self.directory:
+            return
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+        #: files not referenced in this build are dropped
+        records = dict(
+            (path, self.records[path]) for path in self.checked
+            if path in self.records
+        )
+        _dump({'records': records}, self.path)
+
+    def reset(self):
+        """Check every file again, a new build is started."""
+        self.checked = {}
+
+    def hash(self, filepath, check=False):
+        """Returns the hash of ``filepath``, or None if it does not exist.
+        The file is checked once in a build, unless ``check`` is True."""
+        if not check and filepath in self.checked:
+            return self.checked[filepath]
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            self.checked[filepath] = None
+            return None
+
+        record = self.records.get(filepath)
+        if record and record[:3] == \
+           (stat.st_size, stat.st_mtime, self.method):
+            hsh = record[3]
+        else:
+            hsh = self.methods[self.method](filepath)
+            record = (stat.st_size, stat.st_mtime, self.method, hsh)
+            self.records[filepath] = record
+        self.checked[filepath] = hsh
+        self._checked[filepath] = record
+        return hsh
+
+    def collect(self):
+        """Returns the records checked by a render process, which are
+        merged into the main process."""
+        records = self._checked
+        self._checked = {}
+        return records
+
+    def merge(self, records):
+        for filepath, record in records.items():
+            self.records[filepath] = record
+            self.checked[filepath] = record[3]
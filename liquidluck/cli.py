@@ -16,7 +16,8 @@ documentation['help'] = """Felix Felicis %(version)s
 Usage:
     liquidluck init [-s <file>|--settings=<file>]
     liquidluck build [-s <file>|--settings=<file>] %(build)s
-    liquidluck server [-d|--debug] %(server)s
+    liquidluck server [-d|--debug] [-m|--memory] %(server)s
+    liquidluck compile-theme [-s <file>|--settings=<file>]
     liquidluck search [<theme>] [-c|--clean] [-f|--force]
     liquidluck install <theme> [-g|--global]
     liquidluck webhook (start|stop|restart) %(webhook)s
@@ -28,16 +29,20 @@ Options:
     -v --verbose            show more log.
     -q --quiet              show less log.
     -d --debug              set theme.debug=True for server
+    -m --memory             keep the pages in memory for server
     -s --settings=<file>    specify a setting file.
     -o --output=<output>    overwrite output directory.
+    -j --jobs=<jobs>        number of processes to build the site.
+    --profile               record where the build time goes.
     -p --port=<port>        specify the server port.
-    -f --force              search a theme without cache
+    -f --force              search a theme or build without cache
     -c --clean              show theme name only.
     -g --global             install theme to global theme folder.
     --version               show version.
 """ % {
     'version': liquidluck.__version__,
-    'build': '[-o <output>|--output=<output>] [-q|--quiet] [-v|--verbose]',
+    'build': ('[-o <output>|--output=<output>] [-j <jobs>|--jobs=<jobs>] '
+              '[-f|--force] [--profile] [-q|--quiet] [-v|--verbose]'),
     'webhook': '[-s <file>|--settings=<file>] [-p <port>|--port=<port>]',
     'server': '[-s <file>|--settings=<file>] [-p <port>|--port=<port>]',
 }
@@ -61,23 +66,37 @@ Options:
     -q --quiet              show less log.
     -s --settings=<file>    specify a setting file.
     -o --output=<output>    overwrite output directory.
+    -j --jobs=<jobs>        number of processes to build the site.
+    -f --force              build without cache.
+    --profile               record where the build time goes.
 """ % {
-    'build': '[-o <output>|--output=<output>] [-q|--quiet] [-v|--verbose]',
+    'build': ('[-o <output>|--output=<output>] [-j <jobs>|--jobs=<jobs>] '
+              '[-f|--force] [--profile] [-q|--quiet] [-v|--verbose]'),
 }
 
 documentation['server'] = """
 Usage:
-    liquidluck server [-d|--debug] %(server)s
+    liquidluck server [-d|--debug] [-m|--memory] %(server)s
 
 Options:
     -h --help               show this screen.
     -d --debug              set theme.debug=True for server
+    -m --memory             keep the pages in memory, not write them.
     -s --settings=<file>    specify a setting file.
     -p --port=<port>        specify the server port.
 """ % {
     'server': '[-s <file>|--settings=<file>] [-p <port>|--port=<port>]',
 }
 
+documentation['compile-theme'] = """
+Usage:
+    liquidluck compile-theme [-s <file>|--settings=<file>]
+
+Options:
+    -h --help               show this screen.
+    -s --settings=<file>    specify a setting file.
+"""
+
 documentation['search'] = """
 Usage:
     liquidluck search [<theme>] [-c|--clean] [-f|--force]
@@ -141,6 +160,8 @@ def main():
         generator.create_settings(arg_settings)
     elif command == 'build':
         arg_output = args.get('--output')
+        arg_jobs = int(args.get('--jobs') or 1)
+        arg_profile = args.get('--profile')
         if not arg_settings:
             answer = raw_input(
                 "Can't find your setting files, "
@@ -150,7 +171,9 @@ def main():
                 return
             generator.create_settings(arg_settings)
         else:
-            generator.build(arg_settings, arg_output)
+            generator.build(
+                arg_settings, arg_output, arg_force, arg_jobs, arg_profile
+            )
     elif command == 'server':
         arg_debug = args.get('--debug')
         if arg_debug:
@@ -170,7 +193,12 @@ def main():
         else:
             _type = 'clean'
         server.config(arg_port, g.output_directory, _type)
-        server.start_server(arg_debug)
+        server.start_server(arg_debug, args.get('--memory'))
+    elif command == 'compile-theme':
+        if arg_settings and os.path.exists(arg_settings):
+            generator.compile_theme(arg_settings)
+        else:
+            print('setting file not found')
     elif command == 'search':
         theme.search(arg_theme, arg_clean, arg_force)
     elif command == 'install':
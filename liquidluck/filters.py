@@ -3,12 +3,12 @@
 
 import os
 import re
-import hashlib
 import logging
 import datetime
 from jinja2 import contextfunction, contextfilter
 from liquidluck.options import g, settings
-from liquidluck.utils import to_unicode, to_bytes, get_relative_base
+from liquidluck.utils import to_unicode, get_relative_base
+from liquidluck.taxonomy import get_wiki_index
 
 
 def xmldatetime(value):
@@ -30,10 +30,41 @@ def feed_updated(feed):
     return xmldatetime(latest)
 
 
+_urls = {}
+_relative_bases = {}
+
+
+def _relative_base(filepath):
+    base = _relative_bases.get(filepath)
+    if base is None:
+        base = _relative_bases[filepath] = get_relative_base(filepath)
+    return base
+
+
 @contextfunction
 def content_url(ctx, base, *args):
     writer = ctx.get('writer')
+    relative = None
+    if settings.config.get('relative_url', False) and writer:
+        relative = _relative_base(writer['filepath'])
+
+    #: settings are part of the key, they can be changed between builds
+    key = (base, args, settings.config.get('permalink'), relative)
+    try:
+        return _urls[key]
+    except KeyError:
+        pass
+    except TypeError:
+        #: unhashable arguments
+        return _content_url(base, args, relative)
+
+    if len(_urls) > 10000:
+        _urls.clear()
+    url = _urls[key] = _content_url(base, args, relative)
+    return url
+
 
+def _content_url(base, args, relative=None):
     def fix_index(url):
         if url.endswith('/index.html'):
             return url[:-10]
@@ -41,12 +72,11 @@ def content_url(ctx, base, *args):
 
     args = list(args)
     base = to_unicode(base)
-    use_relative_url = settings.config.get('relative_url', False)
     if base.startswith('http://') or base.startswith('https://'):
         prefix = '%s/' % base.rstrip('/')
 
-    elif use_relative_url and writer:
-        prefix = '%s/' % get_relative_base(writer['filepath'])
+    elif relative is not None:
+        prefix = '%s/' % relative
         args.insert(0, base)
     else:
         prefix = '/'
@@ -85,12 +115,22 @@ def content_url(ctx, base, *args):
     return url
 
 
+_tagclouds = {}
+
+
+def has_tagcloud():
+    """If TagCloudWriter is active, tags link to the tag cloud."""
+    writers = tuple(settings.writer['active'])
+    if writers not in _tagclouds:
+        _tagclouds[writers] = any('TagCloud' in o for o in writers)
+    return _tagclouds[writers]
+
+
 @contextfilter
 def tag_url(ctx, tag, prepend_site=False):
     prefix = settings.site.get('prefix', '')
     url = settings.site.get('url')
-    writers = settings.writer['active']
-    tagcloud = any((True for o in writers if 'TagCloud' in o))
+    tagcloud = has_tagcloud()
 
     if prepend_site and tagcloud:
         return '%s#%s' % (content_url(ctx, url, prefix, 'tag', 'index.html'),
@@ -110,54 +150,47 @@ def year_url(ctx, post):
     return content_url(ctx, prefix, post.date.year, 'index.html')
 
 
-_Post = {}
+_wiki_link_re = re.compile(r'\[\[([^\]]+)\]\]', re.M)
 
 
 @contextfilter
 def wiki_link(ctx, content):
-    global _Post
     from liquidluck.writers.base import permalink
 
-    def link_post(m):
-        if not _Post:
-            for item in g.public_posts:
-                _Post[item.title] = item
+    index = get_wiki_index()
 
+    def link_post(m):
         text = m.group(1)
         if '|' in text:
-            title, content = text.split('|')
+            title, content = text.split('|', 1)
         else:
             title = content = text
-        if title in _Post:
-            item = _Post[title]
+        item = index.find(title)
+        if item is None:
+            return '<span class="no-reference">%s</span>' % text
+        if item.date:
             link = permalink(ctx, item)
-            return '<a href="%s">%s</a>' % (link, content)
-        return '<span class="no-reference">%s</span>' % text
-
-    pattern = re.compile(r'\[\[([^\]]+)\]\]', re.M)
-    content = pattern.sub(link_post, content)
-    return content
-
+        else:
+            #: pages are written by their path
+            path = os.path.splitext(item.relative_filepath)[0] + '.html'
+            link = content_url(ctx, path)
+        return '<a href="%s">%s</a>' % (link, content)
 
-_Cache = {}
+    return _wiki_link_re.sub(link_post, content)
 
 
 def static_url(base):
-    global _Cache
 
     def get_hsh(path):
-        if path in _Cache:
-            return _Cache[path]
-        abspath = os.path.join(base, path)
-        if not os.path.exists(abspath):
+        if g.static_cache is None:
+            from liquidluck.cache import StaticCache
+            g.static_cache = StaticCache(
+                method=settings.config.get('static_hash', 'md5'))
+        hsh = g.static_cache.hash(os.path.join(base, path))
+        if hsh is None:
             logging.warn('%s does not exists' % path)
             return ''
-
-        with open(abspath) as f:
-            content = f.read()
-            hsh = hashlib.md5(to_bytes(content)).hexdigest()
-            _Cache[path] = hsh
-            return hsh
+        return hsh
 
     @contextfunction
     def create_url(ctx, path):
@@ -5,9 +5,15 @@ import os
 PROJDIR = os.path.abspath(os.path.dirname(__file__))
 import sys
 import logging
+from jinja2 import TemplateSyntaxError
 from liquidluck.options import g, settings
 from liquidluck.utils import import_object, walk_dir, parse_settings
-from liquidluck.writers.base import load_jinja, find_theme
+from liquidluck.readers.base import BaseReader
+from liquidluck.writers.base import load_jinja, find_theme, render_jobs
+from liquidluck.cache import BuildCache, StaticCache
+from liquidluck.highlight import HighlightCache
+from liquidluck.taxonomy import Taxonomy, WikiIndex
+from liquidluck.profiler import Profiler, profile, reset_profiler
 
 
 def create_settings(filepath):
@@ -85,6 +91,8 @@ def load_settings(path=None):
 
     g.output_directory = os.path.abspath(settings.config.get('output'))
     g.static_directory = os.path.abspath(settings.config.get('static'))
+    if settings.config.get('cache'):
+        g.cache_directory = os.path.abspath(settings.config.get('cache'))
     logging.info('Load Settings Finished')
 
     sys.path.insert(0, find_theme())
@@ -92,66 +100,325 @@ def load_settings(path=None):
     sys.path.insert(0, cwd)
 
 
-def load_posts(path):
-    g.source_directory = path
-    readers = []
-    for name in settings.reader.get('active'):
+_readers = []
+#: extension -> index of the first active reader supports it
+_reader_index = {}
+#: index of readers that have their own ``support``
+_custom_readers = []
+
+
+def load_readers():
+    del _readers[:]
+    for name in settings.reader.get('active') or []:
         try:
-            readers.append(import_object(name))
+            _readers.append(import_object(name))
         except ImportError as e:
             logging.error("Can't enable %s" % name)
             if g.interrupt:
                 raise e
 
-    def detect_reader(filepath):
-        for Reader in readers:
-            reader = Reader(filepath)
-            if reader.support():
-                return reader.run()
+    _reader_index.clear()
+    del _custom_readers[:]
+    for index, Reader in enumerate(_readers):
+        #: unbound methods of python 2 compare by their function
+        if Reader.support != BaseReader.support:
+            _custom_readers.append(index)
+            continue
+        types = Reader.SUPPORT_TYPE
+        if isinstance(types, basestring):
+            types = [types]
+        elif not isinstance(types, (list, tuple)):
+            continue
+        for ext in types:
+            if isinstance(ext, basestring) and ext not in _reader_index:
+                _reader_index[ext] = index
+
+
+def find_reader(filepath):
+    """Returns the reader of the first active reader class that supports
+    ``filepath``, or None."""
+    filename = os.path.basename(filepath)
+    indexes = []
+    #: multi-part extensions, e.g. ``rst.txt``
+    dot = filename.find('.')
+    while dot >= 0:
+        index = _reader_index.get(filename[dot + 1:])
+        if index is not None:
+            indexes.append(index)
+        dot = filename.find('.', dot + 1)
+
+    #: the first active reader wins, not the longest extension
+    indexes = sorted(set(indexes + _custom_readers))
+    for index in indexes:
+        reader = _readers[index](filepath)
+        if index not in _custom_readers or reader.support():
+            return reader
+    return None
+
+
+def detect_reader(filepath):
+    reader = find_reader(filepath)
+    if reader is None:
         return None
+    with profile('reader', reader.__class__.__name__):
+        with profile('source', reader.relative_filepath):
+            return reader.run()
+
+
+def _detect_reader_job(filepath):
+    post = detect_reader(filepath)
+    return post, g.profiler and g.profiler.collect()
+
+
+def parse_files(filepaths, jobs=1):
+    """Parse files with the active readers, if ``jobs`` is more than one,
+    files are parsed in a pool of processes. The posts are returned in the
+    same order of ``filepaths``.
+
+    The processes need the settings and readers of the main process, they
+    are forked from it. Files are parsed one by one where fork is not
+    available.
+    """
+    if jobs > 1 and len(filepaths) > 1 and hasattr(os, 'fork'):
+        import multiprocessing
+        pool = multiprocessing.Pool(jobs, reset_profiler)
+        chunksize = max(1, len(filepaths) // (jobs * 4))
+        try:
+            results = pool.map(_detect_reader_job, filepaths, chunksize)
+        finally:
+            pool.close()
+            pool.join()
+
+        posts = []
+        for post, records in results:
+            if records:
+                g.profiler.merge(records)
+            posts.append(post)
+        return posts
+    return [detect_reader(filepath) for filepath in filepaths]
+
+
+def load_posts(path, jobs=1):
+    g.source_directory = path
+    load_readers()
 
     output = os.path.abspath(g.output_directory)
     source = os.path.abspath(g.source_directory)
     if output == source:
         logging.warn('Output and source are the same directory')
 
-    for filepath in walk_dir(path):
-        if source in output and source != output and \
-           output in os.path.abspath(filepath):
-            continue
-        post = detect_reader(filepath)
-        if not post:
-            g.pure_files.append(filepath)
-        elif not post.date:
-            g.pure_pages.append(post)
-        elif post.public:
-            g.public_posts.append(post)
-        else:
-            g.secure_posts.append(post)
+    filepaths = []
+    posts = {}
+    with profile('stage', 'walk'):
+        for filepath in walk_dir(path):
+            if source in output and source != output and \
+               output in os.path.abspath(filepath):
+                continue
+            filepaths.append(filepath)
+            if find_reader(filepath) is None:
+                #: no reader supports it, e.g. images
+                posts[filepath] = None
+                continue
+            if g.cache:
+                cached, post = g.cache.get_post(filepath)
+                if cached:
+                    posts[filepath] = post
+
+    changed = [filepath for filepath in filepaths if filepath not in posts]
+    with profile('stage', 'parse'):
+        parsed = parse_files(changed, jobs)
+    for filepath, post in zip(changed, parsed):
+        posts[filepath] = post
+        if g.cache:
+            g.cache.set_post(filepath, post)
+
+    for filepath in filepaths:
+        _add_post(filepath, posts[filepath])
+    _sort_posts()
+
+    logging.info('Load Posts Finished')
 
+
+def _add_post(filepath, post):
+    if not post:
+        g.pure_files.append(filepath)
+    elif not post.date:
+        g.pure_pages.append(post)
+    elif post.public:
+        g.public_posts.append(post)
+    else:
+        g.secure_posts.append(post)
+
+
+def _sort_posts():
     g.public_posts = sorted(g.public_posts, key=lambda o: o.date, reverse=True)
     g.secure_posts = sorted(g.secure_posts, key=lambda o: o.date, reverse=True)
+    with profile('stage', 'taxonomy'):
+        g.taxonomy = Taxonomy(g.public_posts)
+        g.wiki_index = WikiIndex(
+            g.public_posts, g.secure_posts, g.pure_pages
+        )
 
-    logging.info('Load Posts Finished')
 
+def update_posts(changes):
+    """Update the posts with ``changes``, a list of ``(path, event)`` of
+    the watcher. Only the changed files are read again, the other posts
+    are kept.
+    """
+    path = g.source_directory
+    source = os.path.abspath(path)
+    output = os.path.abspath(g.output_directory)
+
+    if any(event == 'overflow' for filepath, event in changes):
+        #: anything may have changed
+        g.public_posts = []
+        g.secure_posts = []
+        g.pure_files = []
+        g.pure_pages = []
+        load_posts(path)
+        return
 
-def write_posts():
+    known = set(g.pure_files)
+    for post in g.public_posts + g.secure_posts + g.pure_pages:
+        known.add(post.filepath)
+
+    changed = set()
+    for filepath, event in changes:
+        filepath = os.path.join(path, os.path.relpath(filepath, source))
+        if event == 'deleted' and filepath not in known:
+            #: a deleted directory
+            prefix = filepath.rstrip(os.sep) + os.sep
+            changed.update(o for o in known if o.startswith(prefix))
+        else:
+            changed.add(filepath)
+
+    g.pure_files = [o for o in g.pure_files if o not in changed]
+    g.pure_pages = [o for o in g.pure_pages if o.filepath not in changed]
+    g.public_posts = [o for o in g.public_posts if o.filepath not in changed]
+    g.secure_posts = [o for o in g.secure_posts if o.filepath not in changed]
+
+    for filepath in sorted(changed):
+        if not os.path.isfile(filepath) or \
+           (source in output and source != output and
+                output in os.path.abspath(filepath)):
+            if g.cache:
+                g.cache.remove_post(filepath)
+            continue
+        if find_reader(filepath) is None:
+            _add_post(filepath, None)
+            continue
+        post = None
+        if g.cache:
+            cached, post = g.cache.get_post(filepath)
+        if not post:
+            post = detect_reader(filepath)
+            if g.cache:
+                g.cache.set_post(filepath, post)
+        _add_post(filepath, post)
+    _sort_posts()
+
+    logging.info('Update %d files' % len(changed))
+
+
+def write_posts(jobs=1):
     writers = []
-    for name in settings.writer.get('active'):
-        writers.append(import_object(name)())
+    with profile('stage', 'writers'):
+        for name in settings.writer.get('active'):
+            writers.append(import_object(name)())
+
+    with profile('stage', 'jinja'):
+        load_jinja()
+    if g.cache:
+        g.cache.rotate()
+        g.cache.reset_signature()
+    if g.static_cache is None:
+        g.static_cache = StaticCache(
+            method=settings.config.get('static_hash', 'md5'))
+    g.static_cache.reset()
+    g.stats = {'written': 0, 'skipped': 0}
 
-    load_jinja()
+    if g.memory is not None:
+        g.memory.reset()
+    elif jobs > 1:
+        g.render_queue = []
 
     for writer in writers:
         writer.run()
 
+    if g.memory is not None:
+        g.memory.prune()
+        logging.info('%d pages in memory' % len(g.memory.jobs))
+        return
+
+    if jobs > 1:
+        with profile('stage', 'render'):
+            render_jobs(g.render_queue, jobs)
+        logging.info('Render Finished')
+
+    logging.info('%(written)d files written, %(skipped)d files skipped'
+                 % g.stats)
+
 
-def build(config='settings.py', output=None):
+def compile_theme(config='settings.py'):
+    """Compile the templates into the bytecode cache."""
     load_settings(config)
+    jinja = load_jinja()
+    if not jinja.bytecode_cache:
+        logging.warn('Template cache is disabled')
+        return
+
+    count = 0
+    for name in jinja.list_templates():
+        try:
+            jinja.get_template(name)
+            count += 1
+        except TemplateSyntaxError as e:
+            logging.error('%s: %s' % (name, e))
+        except UnicodeDecodeError:
+            #: every file is listed, e.g. images of the theme
+            logging.debug('%s is not a template' % name)
+        except (IOError, OSError) as e:
+            logging.warn('%s: %s' % (name, e))
+    logging.info('%d templates compiled' % count)
+
+
+def build(config='settings.py', output=None, force=False, jobs=1,
+          profiling=False):
+    if profiling:
+        g.profiler = Profiler()
+
+    with profile('stage', 'settings'):
+        load_settings(config)
     if output:
         output = os.path.abspath(output)
         g.static_directory = g.static_directory.replace(
             g.output_directory, output, 1)
         g.output_directory = output
-    load_posts(settings.config.get('source'))
-    write_posts()
+    if g.cache_directory:
+        g.cache = BuildCache(g.cache_directory)
+        g.static_cache = StaticCache(
+            g.cache_directory, settings.config.get('static_hash', 'md5'))
+        if not force:
+            with profile('stage', 'load cache'):
+                g.cache.load()
+                g.static_cache.load()
+        if settings.config.get('highlight_cache'):
+            g.highlight_cache = HighlightCache(
+                os.path.join(g.cache_directory, 'highlight'),
+                settings.config.get('highlight_cache') * 1024 * 1024,
+            )
+    with profile('stage', 'posts'):
+        load_posts(settings.config.get('source'), jobs)
+    with profile('stage', 'write'):
+        write_posts(jobs)
+    if g.cache:
+        with profile('stage', 'save cache'):
+            g.cache.save()
+            g.static_cache.save()
+    if g.highlight_cache:
+        with profile('stage', 'evict highlight'):
+            g.highlight_cache.evict()
+
+    if profiling:
+        g.profiler.dump('liquidluck-profile.json')
+        print(g.profiler.summary())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+Highlight cache, keep the highlighted code between builds.
+
+Every highlighted code block is saved as a file in the cache directory,
+named by the hash of the lexer, the formatter options and the code. The
+same snippet in another post, or in the next build, is not highlighted
+again. The least recently used files are removed when the cache grows
+over the limit.
+
+:copyright: (c) 2012 by Hsiaoming Yang (aka lepture)
+:license: BSD
+'''
+
+import os
+import hashlib
+import logging
+import pygments
+from liquidluck.options import g
+from liquidluck.utils import to_unicode, utf8
+
+
+class HighlightCache(object):
+    def __init__(self, directory, limit=None):
+        self.directory = directory
+        #: max size of the cache in bytes
+        self.limit = limit
+
+    def key(self, code, lexer, options):
+        md5 = hashlib.md5()
+        md5.update(utf8(repr([
+            pygments.__version__, lexer.name,
+            sorted(lexer.options.items()), sorted(options.items()),
+        ])))
+        md5.update(utf8(code))
+        return md5.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key[2:])
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            f = open(path, 'rb')
+            html = f.read()
+            f.close()
+        except IOError:
+            return None
+        try:
+            #: mark as recently used
+            os.utime(path, None)
+        except OSError:
+            pass
+        return to_unicode(html)
+
+    def set(self, key, html):
+        path = self.path(key)
+        folder = os.path.dirname(path)
+        try:
+            if not os.path.isdir(folder):
+                os.makedirs(folder)
+        except OSError:
+            #: created by another process
+            pass
+        #: processes of ``build -j`` may write the same key
+        tmp = '%s.%d.tmp' % (path, os.getpid())
+        f = open(tmp, 'wb')
+        f.write(utf8(html))
+        f.close()
+        os.rename(tmp, path)
+
+    def highlight(self, code, lexer, options, func):
+        """Returns the cached html, or call ``func`` to highlight."""
+        key = self.key(code, lexer, options)
+        html = self.get(key)
+        if html is None:
+            html = func()
+            self.set(key, html)
+        return html
+
+    def evict(self):
+        """Remove the least recently used files over the limit."""
+        if not self.limit or not os.path.isdir(self.directory):
+            return 0
+
+        files = []
+        total = 0
+        for root, dirs, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        count = 0
+        files.sort()
+        for mtime, size, path in files:
+            if total <= self.limit:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            count += 1
+        if count:
+            logging.debug('Remove %d files from highlight cache' % count)
+        return count
+
+
+def cached_highlight(code, lexer, options, func):
+    """Highlight ``code`` with ``func``, through the highlight cache
+    when it is enabled."""
+    if not g.highlight_cache:
+        return func()
+    return g.highlight_cache.highlight(code, lexer, options, func)
@@ -126,7 +126,17 @@ g.theme_gallery = os.path.expanduser('~/.liquidluck-themes')
 g.theme_directory = os.path.join(
     g.liquid_directory, '_themes', 'default'
 )
+g.cache_directory = None
+g.cache = None
+g.highlight_cache = None
+g.static_cache = None
+g.render_queue = None
+g.memory = None
+g.profiler = None
+g.stats = {'written': 0, 'skipped': 0}
 g.resource = {}
+g.taxonomy = None
+g.wiki_index = None
 g.public_posts = []
 g.secure_posts = []
 g.pure_files = []
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+Profiler, record where the build time goes.
+
+Enable it with ``liquidluck build --profile``, the timings are recorded
+by categories:
+
+    - stage: settings, walk, parse, write ...
+    - reader: parse time of every reader
+    - source: parse time of every source file
+    - highlight: pygments time of every lexer
+    - writer: run time of every writer
+    - template: render time of every template
+    - disk: time of writing files
+
+:copyright: (c) 2012 by Hsiaoming Yang (aka lepture)
+:license: BSD
+'''
+
+import os
+import time
+import logging
+from contextlib import contextmanager
+from liquidluck.options import g
+
+
+def cpu_time():
+    times = os.times()
+    return times[0] + times[1]
+
+
+@contextmanager
+def profile(category, name):
+    profiler = g.profiler
+    if not profiler:
+        yield
+        return
+
+    wall = time.time()
+    cpu = cpu_time()
+    try:
+        yield
+    finally:
+        profiler.record(
+            category, name, time.time() - wall, cpu_time() - cpu
+        )
+
+
+def reset_profiler():
+    """Initializer of child processes, drop the records of the parent."""
+    if g.profiler:
+        g.profiler.records = {}
+
+
+class Profiler(object):
+    def __init__(self):
+        self.records = {}
+        #: keep the order of stages
+        self.stages = []
+
+    def record(self, category, name, wall, cpu, count=1):
+        records = self.records.setdefault(category, {})
+        if name not in records:
+            records[name] = [0, 0.0, 0.0]
+            if category == 'stage' and name not in self.stages:
+                self.stages.append(name)
+        item = records[name]
+        item[0] += count
+        item[1] += wall
+        item[2] += cpu
+
+    def collect(self):
+        """Returns the records and reset, this is used in child processes,
+        the records will be merged into the main process."""
+        records = self.records
+        self.records = {}
+        return records
+
+    def merge(self, records):
+        for category in records:
+            for name, item in records[category].items():
+                count, wall, cpu = item
+                self.record(category, name, wall, cpu, count)
+
+    def items(self, category, count=None):
+        records = self.records.get(category, {})
+        if category == 'stage':
+            names = self.stages
+        else:
+            names = sorted(
+                records, key=lambda o: records[o][1], reverse=True
+            )
+        if count:
+            names = names[:count]
+
+        items = []
+        for name in names:
+            item = records[name]
+            items.append({
+                'name': name, 'count': item[0],
+                'wall': round(item[1], 6), 'cpu': round(item[2], 6),
+            })
+        return items
+
+    def report(self, count=10):
+        report = {}
+        for category in self.records:
+            if category == 'source':
+                report[category] = self.items(category, count)
+            else:
+                report[category] = self.items(category)
+        return report
+
+    def summary(self, count=10):
+        titles = [
+            ('stage', 'Stages'),
+            ('reader', 'Readers'),
+            ('highlight', 'Highlight'),
+            ('writer', 'Writers'),
+            ('template', 'Templates (slowest %d)' % count),
+            ('source', 'Sources (slowest %d)' % count),
+            ('disk', 'Disk'),
+        ]
+        lines = []
+        for category, title in titles:
+            items = self.items(category, count)
+            if not items:
+                continue
+            lines.append(title)
+            lines.append('%-50s %8s %10s %10s' % ('', 'count', 'wall', 'cpu'))
+            for item in items:
+                name = item['name']
+                if len(name) > 50:
+                    name = '...' + name[-47:]
+                lines.append('%-50s %8d %9.3fs %9.3fs' % (
+                    name, item['count'], item['wall'], item['cpu']
+                ))
+            lines.append('')
+        return '\n'.join(lines)
+
+    def dump(self, filepath, count=10):
+        try:
+            import json
+        except ImportError:
+            import simplejson as json
+
+        f = open(filepath, 'w')
+        f.write(json.dumps(self.report(count), indent=2))
+        f.close()
+        logging.info('Profile is saved to %s' % filepath)
@@ -73,36 +73,119 @@ class BaseReader(object):
                 raise e
 
 
+_clean_title_re = re.compile(r'[<>,~!#&\{\}\(\)\[\]\.\*\^\$\?]')
+
+
+class LazyContent(object):
+    """
+    Content that is rendered on the first access of ``post.content``.
+    Enable it with ``lazy_content`` in the vars of reader.
+
+    A reader that supports lazy content should implement
+    ``render_content(source)``, which returns the content and the meta
+    data that comes with it. ``keys`` are the names of the meta data,
+    accessing them will render the content too.
+    """
+    def __init__(self, reader, source, keys=()):
+        #: keep the import path of the reader, so that it can be pickled
+        cls = reader.__class__
+        self.reader = '%s.%s' % (cls.__module__, cls.__name__)
+        self.filepath = reader.filepath
+        self.source = source
+        self.keys = keys
+
+    def render(self):
+        reader = import_object(self.reader)(self.filepath)
+        return reader.render_content(self.source)
+
+
 class Post(object):
-    meta = {}
+    #: derived values are memoized in ``_date``, ``_tags``, ``_author`` and
+    #: ``_clean_title`` as ``(source, value)``, they are computed again
+    #: when the source is changed. ``_slug`` is kept by ``get_post_slug``.
+    #: ``__dict__`` is only created when an attribute out of the slots
+    #: is set.
+    __slots__ = (
+        'filepath', 'title', 'meta', '_content',
+        'relation', 'related_priority',
+        '_date', '_tags', '_author', '_clean_title', '_slug',
+        '__dict__',
+    )
+    _memo_slots = ('_date', '_tags', '_author', '_clean_title', '_slug')
+    #: set by writers in every build, they are not pickled either
+    _build_slots = ('relation', 'related_priority')
 
     def __init__(self, filepath, content, title=None, meta=None):
         self.filepath = filepath
-        self.content = content
+        self._content = content
         if title:
             self.title = title
         else:
             self.title = meta.pop('title')
 
-        if meta:
-            self.meta = meta
+        self.meta = meta or {}
+        self.relation = None
+        self.related_priority = None
+        self._date = self._tags = self._author = self._clean_title = None
+        self._slug = None
+
+    def __getstate__(self):
+        state = dict(getattr(self, '__dict__', {}))
+        for key in self.__slots__:
+            if key == '__dict__' or key in self._memo_slots or \
+                    key in self._build_slots:
+                continue
+            state[key] = getattr(self, key)
+        return state
+
+    def __setstate__(self, state):
+        for key in self._memo_slots + self._build_slots:
+            setattr(self, key, None)
+        for key, value in state.items():
+            if key not in self._build_slots:
+                setattr(self, key, value)
+
+    @property
+    def content(self):
+        content = self._content
+        if isinstance(content, LazyContent):
+            content, meta = content.render()
+            self._content = content
+            if meta:
+                self.meta = dict(self.meta, **meta)
+        return content
+
+    @content.setter
+    def content(self, content):
+        self._content = content
 
     @property
     def clean_title(self):
-        #: https://github.com/lepture/liquidluck/issues/32
-        title = re.sub(
-            r'[<>,~!#&\{\}\(\)\[\]\.\*\^\$\?]', ' ', self.title
-        )
-        return '-'.join(title.strip().split())
+        memo = self._clean_title
+        if memo is None or memo[0] is not self.title:
+            #: https://github.com/lepture/liquidluck/issues/32
+            title = _clean_title_re.sub(' ', self.title)
+            memo = (self.title, '-'.join(title.strip().split()))
+            self._clean_title = memo
+        return memo[1]
 
     @property
     def author(self):
-        author = settings.author.get('default', 'admin')
-        return Author(self.meta.get('author', author))
+        author = self.meta.get('author')
+        if author is None:
+            author = settings.author.get('default', 'admin')
+        memo = self._author
+        if memo is None or memo[0] is not author:
+            memo = self._author = (author, Author(author))
+        return memo[1]
 
     @property
     def date(self):
-        return to_datetime(self.meta.get('date'))
+        value = self.meta.get('date')
+        memo = self._date
+        if memo is None or memo[0] is not value:
+            memo = self._date = (value, to_datetime(value))
+        return memo[1]
 
     @property
     def updated(self):
@@ -124,7 +207,11 @@ class Post(object):
             return []
         if isinstance(tags, (list, tuple)):
             return tags
-        return [tag.strip() for tag in tags.split(",")]
+        memo = self._tags
+        if memo is None or memo[0] is not tags:
+            memo = (tags, [tag.strip() for tag in tags.split(",")])
+            self._tags = memo
+        return memo[1]
 
     @property
     def template(self):
@@ -165,15 +252,19 @@ class Post(object):
         return self.folder
 
     def __getattr__(self, key):
-        try:
-            return super(Post, self).__getattr__(key)
-        except:
-            pass
+        if key.startswith('__') or key in Post.__slots__:
+            #: keep pickle and copy working
+            raise AttributeError(key)
+        content = self._content
+        if isinstance(content, LazyContent) and key in content.keys:
+            self.content
         #: won't raise AttributeError
         return self.meta.get(key)
 
 
 class Author(object):
+    __slots__ = ('author', '_d')
+
     def __init__(self, author):
         self.author = author
 
@@ -36,9 +36,11 @@ from pygments import highlight
 from pygments.formatters import HtmlFormatter
 from pygments.lexers import get_lexer_by_name
 
-from liquidluck.readers.base import BaseReader
+from liquidluck.readers.base import BaseReader, LazyContent
 from liquidluck.options import settings
 from liquidluck.utils import to_unicode, cjk_nowrap, import_object
+from liquidluck.profiler import profile
+from liquidluck.highlight import cached_highlight
 
 
 class MarkdownReader(BaseReader):
@@ -62,24 +64,29 @@ class MarkdownReader(BaseReader):
         f.close()
         body = to_unicode(body)
         meta = self._parse_meta(header, body)
-        content = self._parse_content(body)
-        meta['toc'] = content.toc_html
+        if self.get('lazy_content'):
+            content = LazyContent(self, body, keys=('toc',))
+        else:
+            content, _meta = self.render_content(body)
+            meta.update(_meta)
         return self.post_class(self.filepath, content, meta=meta)
 
+    def render_content(self, body):
+        content = self._parse_content(body)
+        return content, {'toc': content.toc_html}
+
     def _parse_content(self, body):
         return markdown(body)
 
     def _parse_meta(self, header, body):
-        header = markdown2.markdown(to_unicode(header))
-        titles = re.findall(r'<h1>(.*)</h1>', header)
-        if not titles:
+        parsed = parse_meta(to_unicode(header))
+        if parsed is None:
+            parsed = self._parse_meta_with_markdown(header)
+        title, items = parsed
+        if title is None:
             logging.error('There is no title')
-            title = None
-        else:
-            title = titles[0]
 
         meta = {'title': title}
-        items = re.findall(r'<li>(.*?)</li>', header, re.S)
         for item in items:
             index = item.find(':')
             key = item[:index].rstrip()
@@ -92,6 +99,65 @@ class MarkdownReader(BaseReader):
         # meta['toc'] = _toc.render(body)
         return meta
 
+    def _parse_meta_with_markdown(self, header):
+        header = markdown2.markdown(to_unicode(header))
+        titles = re.findall(r'<h1>(.*)</h1>', header)
+        if not titles:
+            title = None
+        else:
+            title = titles[0]
+
+        items = re.findall(r'<li>(.*?)</li>', header, re.S)
+        return title, items
+
+
+_meta_title_re = re.compile(r'^# +(.+?) *#* *$')
+_meta_item_re = re.compile(r'^[-*+] +(.*)$')
+#: text that markdown would change
+_meta_escape_re = re.compile(r'[\\`*_<>&\[\]!#\t\r]|^\s|\s$')
+
+
+def parse_meta(header):
+    """Parse the header of a post without markdown::
+
+        # title
+
+        - key: value
+        - key: value
+
+    Returns ``(title, items)`` which is the same as markdown would do.
+    If the header is not in this simple form, returns None.
+    """
+    title = None
+    items = []
+    for line in header.replace('\r\n', '\n').split('\n'):
+        if not line.strip():
+            if items:
+                #: the list is finished
+                items.append(None)
+            continue
+
+        if title is None:
+            m = _meta_title_re.match(line)
+            if not m:
+                return None
+            title = m.group(1)
+            if _meta_escape_re.search(title):
+                return None
+            continue
+
+        m = _meta_item_re.match(line)
+        if not m or (items and items[-1] is None):
+            return None
+        item = m.group(1)
+        if _meta_escape_re.search(item):
+            return None
+        items.append(item)
+
+    if title is None:
+        return None
+    return title, [item for item in items if item is not None]
+
 
 # #: compatible
 # JuneRender = LiquidRender
@@ -147,27 +213,20 @@ class LLMarkdown(markdown2.Markdown):
         self._toc.append((level, id, header_no + self._unescape_special_chars(name)))
 
     def _do_auto_links(self, text):
-        variables = settings.reader.get('vars') or {}
-        for func in variables.get(
-            'markdown_transform', [
-                'liquidluck.readers.markdown.transform_youtube',
-                'liquidluck.readers.markdown.transform_gist',
-                'liquidluck.readers.markdown.transform_vimeo',
-                'liquidluck.readers.markdown.transform_github',
-            ]):
-            func = import_object(func)
+        for func in get_transforms():
             text = func(text)
 
         text = super(LLMarkdown, self)._do_auto_links(text)
         return text
 
+    _footnote_tag_re = re.compile(r'''<sup class="footnote-ref" id="fnref-(.+)"><a href="#fn-\1">(\d+)</a></sup>''')
+
     def _sort_footnotes(self, text):
         """ ref-> https://github.com/an0/python-markdown2/commit/ab1aad66cc7b3ae2f66ecf3af22b9ef71b98b381
         Because _do_links is not applied to the text in text flow order,
         footnotes are not generated in proper order,
         we have to sort them before _add_footnotes.
         """
-        _footnote_tag_re = re.compile(r'''<sup class="footnote-ref" id="fnref-(.+)"><a href="#fn-\1">(\d+)</a></sup>''')
         self.footnote_ids = []
         def _repl(match):
             id = match.group(1)
@@ -178,7 +237,7 @@ class LLMarkdown(markdown2.Markdown):
                 return match.string[match.start(0):match.start(2)] + str(self.footnote_ids.index(id) + 1) + match.string[match.end(2):match.end(0)]
             else:
                 return match.string[match.start():match.end()]
-        return _footnote_tag_re.sub(_repl, text)
+        return self._footnote_tag_re.sub(_repl, text)
 
     def _add_footnotes(self, text):
         text = self._sort_footnotes(text)
@@ -187,6 +246,17 @@ class LLMarkdown(markdown2.Markdown):
     def reset(self):
         super(LLMarkdown, self).reset()
         self._headers = [] # stack of current count for that hN header
+        self._toc = None
+
+    def _color_with_pygments(self, codeblock, lexer, **formatter_opts):
+        def color():
+            with profile('highlight', lexer.name):
+                return super(LLMarkdown, self)._color_with_pygments(
+                    codeblock, lexer, **formatter_opts
+                )
+
+        options = dict(formatter_opts, reader='markdown')
+        return cached_highlight(codeblock, lexer, options, color)
 
     def preprocess(self, text):
         """to avoid javascript fenced code block parsing error, do fenced code blocks before hash html blocks
@@ -197,12 +267,42 @@ class LLMarkdown(markdown2.Markdown):
         return text
 
 
+_fence_plus_re = re.compile(r'^````(\w+)', re.M)
+_fence_minus_re = re.compile(r'^`````(\w+)', re.M)
+_markdown = None
+
+
+def get_markdown():
+    """The converter is created once, and reset for every document."""
+    global _markdown
+    if _markdown is None:
+        _markdown = LLMarkdown(extras=['code-friendly', 'fenced-code-blocks',
+            'footnotes', 'toc', 'wiki-tables'])
+    return _markdown
+
+
+DEFAULT_TRANSFORMS = [
+    'liquidluck.readers.markdown.transform_youtube',
+    'liquidluck.readers.markdown.transform_gist',
+    'liquidluck.readers.markdown.transform_vimeo',
+    'liquidluck.readers.markdown.transform_github',
+]
+_transforms = {}
+
+
+def get_transforms():
+    """Functions of ``markdown_transform``, they are imported only once."""
+    variables = settings.reader.get('vars') or {}
+    names = tuple(variables.get('markdown_transform', DEFAULT_TRANSFORMS))
+    if names not in _transforms:
+        _transforms[names] = [import_object(name) for name in names]
+    return _transforms[names]
+
+
 def markdown(text):
     text = to_unicode(text)
-    regex = re.compile(r'^````(\w+)', re.M)
-    text = regex.sub(r'````\1+', text)
-    regex = re.compile(r'^`````(\w+)', re.M)
-    text = regex.sub(r'`````\1-', text)
+    text = _fence_plus_re.sub(r'````\1+', text)
+    text = _fence_minus_re.sub(r'`````\1-', text)
 
     # render = LiquidRender(flags=m.HTML_USE_XHTML | m.HTML_TOC)
     # md = m.Markdown(
@@ -214,9 +314,7 @@ def markdown(text):
     # )
     # return md.render(text)
 
-    md = LLMarkdown(extras=['code-friendly', 'fenced-code-blocks', 'footnotes',
-        'toc', 'wiki-tables'])
-    return md.convert(text)
+    return get_markdown().convert(text)
 
 
 # _XHTML_ESCAPE_RE = re.compile('[&<>"]')
@@ -233,80 +331,87 @@ def markdown(text):
 
 #: markdown autolink transform
 
+_youtube_link_re = re.compile(r'<(http://www.youtube.com/watch\?v=([a-zA-Z0-9\-\_]+))>', re.I)
+_youtube_link2_re = re.compile(r'<(http://youtu.be/([a-zA-Z0-9\-\_]+))>', re.I)
+_gist_link_re = re.compile(r'<(https?://gist.github.com/[\d]+)>', re.I)
+_vimeo_link_re = re.compile(r'<(http://vimeo.com/([\d]+))>', re.I)
+_screenr_link_re = re.compile(r'<(http://www.screenr.com/([a-zA-Z0-9]+))>', re.I)
+_github_link_re = re.compile(r'([a-zA-Z0-9]+)/([a-zA-Z0-9_\-]+)@([a-fA-F0-9]{40})')
+_github_link2_re = re.compile(r'<https?://github.com/([a-zA-Z0-9]+)/([a-zA-Z0-9_\-]+)/commit/([a-fA-F0-9]{40})>')
+
+
+def _youtube_link_sub(match):
+    link = match.group(1)
+    title = link.replace('http://','')
+    return ('<iframe width="560" height="315" src='
+            '"http://www.youtube.com/embed/%(id)s" '
+            'frameborder="0" allowfullscreen></iframe>'
+            '<span><a rel="nofollow" href="%(link)s">'
+            '%(title)s</a></span>'
+            ) % {'id': match.group(2), 'link': link, 'title': title}
+
+
 def transform_youtube(text):
     #: youtube.com
-    def auto_youtube_link_sub(match):
-        link = match.group(1)
-        title = link.replace('http://','')
-        return ('<iframe width="560" height="315" src='
-                '"http://www.youtube.com/embed/%(id)s" '
-                'frameborder="0" allowfullscreen></iframe>'
-                '<span><a rel="nofollow" href="%(link)s">'
-                '%(title)s</a></span>'
-                ) % {'id': match.group(2), 'link': link, 'title': title}
-
-    auto_youtube_link_re = re.compile(r'<(http://www.youtube.com/watch\?v=([a-zA-Z0-9\-\_]+))>', re.I)
-    auto_youtube_link2_re = re.compile(r'<(http://youtu.be/([a-zA-Z0-9\-\_]+))>', re.I)
-    text = auto_youtube_link_re.sub(auto_youtube_link_sub, text)
-    return auto_youtube_link2_re.sub(auto_youtube_link_sub, text)
+    text = _youtube_link_re.sub(_youtube_link_sub, text)
+    return _youtube_link2_re.sub(_youtube_link_sub, text)
+
+
+def _gist_link_sub(match):
+    link = match.group(1)
+    title = link.replace('http://', '').replace('https://', '')
+    return ('<script src="%(link)s.js"></script>'
+            '<span><a rel="nofollow" href="%(link)s">'
+            '%(title)s</a></span>'
+            ) % {'link': link, 'title': title}
 
 
 def transform_gist(text):
     #: gist support
-    def auto_gist_link_sub(match):
-        link = match.group(1)
-        title = link.replace('http://', '').replace('https://', '')
-        return ('<script src="%(link)s.js"></script>'
-                '<span><a rel="nofollow" href="%(link)s">'
-                '%(title)s</a></span>'
-                ) % {'link': link, 'title': title}
+    return _gist_link_re.sub(_gist_link_sub, text)
 
-    auto_gist_link_re = re.compile(r'<(https?://gist.github.com/[\d]+)>', re.I)
-    return auto_gist_link_re.sub(auto_gist_link_sub, text)
+
+def _vimeo_link_sub(match):
+    link = match.group(1)
+    title = link.replace('http://','')
+    return ('<iframe width="500" height="281" frameborder="0" '
+            'src="http://player.vimeo.com/video/%(id)s" '
+            'allowFullScreen></iframe>'
+            '<span><a rel="nofollow" href="%(link)s">'
+            '%(title)s</a></span>'
+            ) % {'id': match.group(2), 'link': link, 'title': title}
 
 
 def transform_vimeo(text):
     #: vimeo.com
-    def auto_vimeo_link_sub(match):
-        link = match.group(1)
-        title = link.replace('http://','')
-        return ('<iframe width="500" height="281" frameborder="0" '
-                'src="http://player.vimeo.com/video/%(id)s" '
-                'allowFullScreen></iframe>'
-                '<span><a rel="nofollow" href="%(link)s">'
-                '%(title)s</a></span>'
-                ) % {'id': match.group(2), 'link': link, 'title': title}
+    return _vimeo_link_re.sub(_vimeo_link_sub, text)
+
 
-    auto_vimeo_link_re = re.compile(r'<(http://vimeo.com/([\d]+))>', re.I)
-    return auto_vimeo_link_re.sub(auto_vimeo_link_sub, text)
+def _screenr_link_sub(match):
+    link = match.group(1)
+    title = link.replace('http://','')
+    return ('<iframe width="500" height="305" frameborder="0" '
+            'src="http://www.screenr.com/embed/%(id)s" '
+            'allowFullScreen></iframe>'
+            '<span><a rel="nofollow" href="%(link)s">'
+            '%(title)s</a></span>'
+            ) % {'id': match.group(2), 'link': link, 'title': title}
 
 
 def transform_screenr(text):
     #: screenr.com
-    def auto_screenr_link_sub(match):
-        link = match.group(1)
-        title = link.replace('http://','')
-        return ('<iframe width="500" height="305" frameborder="0" '
-                'src="http://www.screenr.com/embed/%(id)s" '
-                'allowFullScreen></iframe>'
-                '<span><a rel="nofollow" href="%(link)s">'
-                '%(title)s</a></span>'
-                ) % {'id': match.group(2), 'link': link, 'title': title}
+    return _screenr_link_re.sub(_screenr_link_sub, text)
+
 
-    auto_screenr_link_re = re.compile(r'<(http://www.screenr.com/([a-zA-Z0-9]+))>', re.I)
-    return auto_screenr_link_re.sub(auto_screenr_link_sub, text)
+def _github_link_sub(match):
+    link = 'https://github.com/%s/%s/commit/%s' % (match.group(1), match.group(2), match.group(3))
+    title = '%s/%s@%s' % (match.group(1), match.group(2), match.group(3)[:7])
+    return ('<a rel="nofollow" href="%(link)s">'
+            '%(title)s</a>'
+            ) % {'link': link, 'title': title}
 
 
 def transform_github(text):
     #: github
-    def auto_github_link_sub(match):
-        link = 'https://github.com/%s/%s/commit/%s' % (match.group(1), match.group(2), match.group(3))
-        title = '%s/%s@%s' % (match.group(1), match.group(2), match.group(3)[:7])
-        return ('<a rel="nofollow" href="%(link)s">'
-                '%(title)s</a>'
-                ) % {'link': link, 'title': title}
-
-    auto_github_link_re = re.compile(r'([a-zA-Z0-9]+)/([a-zA-Z0-9_\-]+)@([a-fA-F0-9]{40})')
-    auto_github_link2_re = re.compile(r'<https?://github.com/([a-zA-Z0-9]+)/([a-zA-Z0-9_\-]+)/commit/([a-fA-F0-9]{40})>')
-    text = auto_github_link_re.sub(auto_github_link_sub, text)
-    return auto_github_link2_re.sub(auto_github_link_sub, text)
+    text = _github_link_re.sub(_github_link_sub, text)
+    return _github_link2_re.sub(_github_link_sub, text)
@@ -39,6 +39,8 @@ from pygments.lexers import get_lexer_by_name, TextLexer
 from liquidluck.readers.base import BaseReader
 from liquidluck.options import settings
 from liquidluck.utils import to_unicode, utf8
+from liquidluck.profiler import profile
+from liquidluck.highlight import cached_highlight
 
 
 class RestructuredTextReader(BaseReader):
@@ -132,9 +134,19 @@ class Pygments(Directive):
             lexer = TextLexer()
         # take an arbitrary option if more than one is given
 
-        formatter = self.options and VARIANTS[self.options.keys()[0]] \
-                or DEFAULT
-        parsed = highlight('\n'.join(self.content), lexer, formatter)
+        variant = self.options and self.options.keys()[0] or None
+        formatter = variant and VARIANTS[variant] or DEFAULT
+        code = '\n'.join(self.content)
+
+        def color():
+            with profile('highlight', lexer.name):
+                return highlight(code, lexer, formatter)
+
+        options = {
+            'reader': 'restructuredtext', 'variant': variant,
+            'noclasses': INLINESTYLES,
+        }
+        parsed = cached_highlight(code, lexer, options, color)
         return [nodes.raw('', parsed, format='html')]
 
 directives.register_directive('sourcecode', Pygments)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+Taxonomy, group the public posts by year, month, tag, category and author,
+and find posts and pages by their names for wiki links.
+
+The groups are built in one pass after the posts are loaded, posts in
+every group keep the order of ``g.public_posts``, which is the newest
+first. Writers and templates share the same groups::
+
+    from liquidluck.taxonomy import get_taxonomy
+
+    for tag, posts in get_taxonomy().tags.items():
+        ...
+
+:copyright: (c) 2012 by Hsiaoming Yang (aka lepture)
+:license: BSD
+'''
+
+from liquidluck.options import g
+
+
+class Taxonomy(object):
+    def __init__(self, posts):
+        self.posts = posts
+        self.years = {}
+        #: (year, month) -> posts
+        self.months = {}
+        self.tags = {}
+        self.categories = {}
+        self.authors = {}
+
+        for post in posts:
+            date = post.date
+            self.years.setdefault(date.year, []).append(post)
+            self.months.setdefault((date.year, date.month), []).append(post)
+            for tag in post.tags:
+                self.tags.setdefault(tag, []).append(post)
+            if post.category:
+                self.categories.setdefault(post.category, []).append(post)
+            self.authors.setdefault(post.author.author, []).append(post)
+
+
+def get_taxonomy():
+    """Returns the taxonomy of ``g.public_posts``, it is built again when
+    the posts are changed."""
+    if g.taxonomy is None or g.taxonomy.posts is not g.public_posts:
+        g.taxonomy = Taxonomy(g.public_posts)
+    return g.taxonomy
+
+
+def _wiki_key(name):
+    return ' '.join(name.lower().split())
+
+
+def _aliases(post):
+    aliases = post.meta.get('alias')
+    if not aliases:
+        return []
+    if isinstance(aliases, (list, tuple)):
+        return aliases
+    return [o.strip() for o in aliases.split(',')]
+
+
+class WikiIndex(object):
+    """
+    Find a post or a page for ``[[name]]``. The name is matched with:
+
+        1. the title
+        2. the title, case insensitive
+        3. ``alias`` in meta, comma separated, case insensitive
+        4. the clean title and the filename, case insensitive
+
+    Public posts come before pages, and pages come before secure posts.
+    """
+    def __init__(self, public_posts, secure_posts, pages):
+        self.sources = (public_posts, secure_posts, pages)
+        posts = list(public_posts) + list(pages) + list(secure_posts)
+
+        self.titles = {}
+        self.names = {}
+        for post in posts:
+            self.titles.setdefault(post.title, post)
+        for post in posts:
+            self.names.setdefault(_wiki_key(post.title), post)
+        for post in posts:
+            for alias in _aliases(post):
+                self.names.setdefault(_wiki_key(alias), post)
+        for post in posts:
+            self.names.setdefault(_wiki_key(post.clean_title), post)
+            self.names.setdefault(_wiki_key(post.filename), post)
+
+    def find(self, name):
+        post = self.titles.get(name)
+        if post is None:
+            post = self.names.get(_wiki_key(name))
+        return post
+
+
+def get_wiki_index():
+    """Returns the wiki index of the current posts and pages, it is built
+    again when they are changed."""
+    sources = (g.public_posts, g.secure_posts, g.pure_pages)
+    index = g.wiki_index
+    if index is None or \
+       any(a is not b for a, b in zip(index.sources, sources)):
+        g.wiki_index = WikiIndex(*sources)
+    return g.wiki_index
@@ -22,6 +22,10 @@ config = {
     "perpage": 30,
     "feedcount": 20,
     "timezone": "+08:00",
+    "cache": ".liquidluck-cache",
+    "skip_unchanged": False,
+    "highlight_cache": 50,  # megabytes
+    "static_hash": "md5",  # or crc32
 }
 
 
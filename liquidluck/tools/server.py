@@ -1,12 +1,19 @@
 #!/usr/bin/env python
 
 import os
+import types
+import hashlib
 import mimetypes
 import logging
-from wsgiref.simple_server import make_server
+from email.utils import formatdate, parsedate_tz, mktime_tz
+from wsgiref.simple_server import make_server, ServerHandler
+from wsgiref.simple_server import WSGIRequestHandler
 from liquidluck.options import g, settings
-from liquidluck.utils import to_unicode, UnicodeDict, walk_dir
-from liquidluck.generator import load_posts, write_posts
+from liquidluck.utils import to_unicode, UnicodeDict
+from liquidluck.generator import load_posts, write_posts, update_posts
+from liquidluck.cache import BuildCache, StaticCache
+from liquidluck.writers.base import MemoryOutput
+from liquidluck.tools.watcher import get_watcher, ChangeSet
 try:
     import tornado.web
     import tornado.escape
@@ -20,6 +27,19 @@ except ImportError:
     RequestHandler = object
     WebSocketHandler = object
 
+try:
+    from tornado.gen import coroutine
+except ImportError:
+    def coroutine(func):
+        """Run the generator to the end, for tornado without coroutine,
+        whose ``flush`` returns nothing to wait."""
+        def wrapper(*args, **kwargs):
+            result = func(*args, **kwargs)
+            if isinstance(result, types.GeneratorType):
+                for future in result:
+                    pass
+        return wrapper
+
 
 HOST = '127.0.0.1'
 PORT = 8000
@@ -83,6 +103,20 @@ def translate_path(path):
     return os.path.normpath(abspath)
 
 
+def _memory_path(path):
+    """Find the destination of ``path`` in the pages kept in memory."""
+    path = path.lstrip('/')
+    if path == '' or path.endswith('/'):
+        candidates = [path + 'index.html', path.rstrip('/') + '.html']
+    else:
+        candidates = [path, path + '.html', path + '/index.html']
+    for candidate in candidates:
+        abspath = os.path.normpath(os.path.join(ROOT, candidate))
+        if abspath in g.memory:
+            return abspath
+    return None
+
+
 def _read(abspath):
     if os.path.isdir(abspath):
         return _autoindex(abspath)
@@ -96,27 +130,254 @@ def _read(abspath):
     return content
 
 
+def _etag(body):
+    return '"%s"' % hashlib.md5(body).hexdigest()
+
+
+def _file_etag(abspath):
+    """ETag of a file, the hash is kept in the static cache until the
+    size or the modified time of the file changes."""
+    if g.static_cache is None:
+        g.static_cache = StaticCache(
+            method=settings.config.get('static_hash', 'md5'))
+    return '"%s"' % g.static_cache.hash(abspath, check=True)
+
+
+def _cache_headers(mime_type, etag, mtime=None):
+    if mime_type == 'text/html':
+        #: pages are changed by the watcher, always validate them
+        cache_control = 'no-cache'
+    else:
+        cache_control = settings.config.get('static_cache_control') or \
+            'no-cache'
+    headers = [('Cache-Control', cache_control), ('Etag', etag)]
+    if mtime:
+        headers.append(('Last-Modified', formatdate(mtime, usegmt=True)))
+    return headers
+
+
+def _is_not_modified(if_none_match, if_modified_since, etag, mtime=None):
+    """Check the conditional headers of the request."""
+    if if_none_match:
+        etags = [o.strip() for o in if_none_match.split(',')]
+        #: weak comparison, the same as a GET request should
+        etags = [o[2:] if o.startswith('W/') else o for o in etags]
+        return '*' in etags or etag in etags
+    if if_modified_since and mtime:
+        date = parsedate_tz(if_modified_since)
+        if date is None:
+            return False
+        return int(mtime) <= mktime_tz(date)
+    return False
+
+
+def _parse_range(value, size):
+    """Parse the Range header, returns ``(start, end)`` of the bytes, the
+    end is included. Returns None to send the whole file, and False when
+    the range is not satisfiable."""
+    if not value or not value.startswith('bytes='):
+        return None
+    ranges = value[6:].split(',')
+    if len(ranges) > 1:
+        #: multiple ranges are not supported, send the whole file
+        return None
+    start, _, end = ranges[0].strip().partition('-')
+    try:
+        if not start:
+            #: the last bytes of the file
+            length = int(end)
+            if not length or not size:
+                return False
+            return max(size - length, 0), size - 1
+        start = int(start)
+        end = int(end) if end else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        return False
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+class FileRange(object):
+    """Iterate ``length`` bytes of a file from ``start`` in chunks, the
+    file is closed by ``close``."""
+
+    def __init__(self, f, start, length, chunk_size=65536):
+        self.f = f
+        self.start = start
+        self.length = length
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        self.f.seek(self.start)
+        remain = self.length
+        while remain > 0:
+            chunk = self.f.read(min(self.chunk_size, remain))
+            if not chunk:
+                break
+            remain -= len(chunk)
+            yield chunk
+
+    def close(self):
+        self.f.close()
+
+
+_status = {
+    200: '200 OK',
+    206: '206 Partial Content',
+    304: '304 Not Modified',
+    416: '416 Requested Range Not Satisfiable',
+}
+
+
+def _serve_file(abspath, mime_type, get_header):
+    """Returns ``(status, headers, body)`` of a file, the body is a
+    FileRange or None. ``get_header`` returns a header of the request."""
+    stat = os.stat(abspath)
+    etag = _file_etag(abspath)
+    headers = [('Content-Type', mime_type), ('Accept-Ranges', 'bytes')]
+    headers.extend(_cache_headers(mime_type, etag, stat.st_mtime))
+    if _is_not_modified(get_header('If-None-Match'),
+                        get_header('If-Modified-Since'), etag, stat.st_mtime):
+        return 304, headers, None
+
+    size = stat.st_size
+    byte_range = None
+    if_range = get_header('If-Range')
+    if not if_range or if_range in (etag, dict(headers)['Last-Modified']):
+        byte_range = _parse_range(get_header('Range'), size)
+
+    if byte_range is False:
+        headers.append(('Content-Range', 'bytes */%d' % size))
+        headers.append(('Content-Length', '0'))
+        return 416, headers, None
+
+    status = 200
+    start, end = 0, size - 1
+    if byte_range:
+        status = 206
+        start, end = byte_range
+        headers.append(('Content-Range', 'bytes %d-%d/%d' % (
+            start, end, size)))
+    headers.append(('Content-Length', str(end - start + 1)))
+    return status, headers, FileRange(
+        open(abspath, 'rb'), start, end - start + 1)
+
+
+@coroutine
+def _send_file(handler, abspath, mime_type):
+    """Send a file with a tornado handler, chunk by chunk."""
+    status, headers, body = _serve_file(
+        abspath, mime_type, handler.request.headers.get
+    )
+    handler.set_status(status)
+    for key, value in headers:
+        handler.set_header(key, value)
+    if body is None:
+        return
+    try:
+        for chunk in body:
+            handler.write(chunk)
+            #: wait until the chunk is sent, keep one chunk in memory
+            future = handler.flush()
+            if future is not None:
+                yield future
+    finally:
+        body.close()
+
+
+class SendfileServerHandler(ServerHandler):
+    """Send FileRange with ``os.sendfile`` if it is available."""
+
+    def result_is_file(self):
+        return isinstance(self.result, FileRange)
+
+    def sendfile(self):
+        if not hasattr(os, 'sendfile'):
+            return False
+        try:
+            out = self.stdout.fileno()
+        except Exception:
+            return False
+
+        if not self.headers_sent:
+            self.send_headers()
+        self._flush()
+        result = self.result
+        offset = result.start
+        remain = result.length
+        fd = result.f.fileno()
+        while remain > 0:
+            sent = os.sendfile(out, fd, offset, remain)
+            if not sent:
+                break
+            offset += sent
+            remain -= sent
+        self.bytes_sent = result.length - remain
+        return True
+
+
+class SendfileRequestHandler(WSGIRequestHandler):
+    def handle(self):
+        self.raw_requestline = self.rfile.readline(65537)
+        if len(self.raw_requestline) > 65536:
+            self.requestline = ''
+            self.request_version = ''
+            self.command = ''
+            self.send_error(414)
+            return
+        if not self.parse_request():
+            return
+
+        handler = SendfileServerHandler(
+            self.rfile, self.wfile, self.get_stderr(), self.get_environ()
+        )
+        handler.request_handler = self
+        handler.run(self.server.get_app())
+
+
+def _check_modified(handler, mime_type, etag, mtime=None):
+    """Set the cache headers of a tornado handler, returns False and
+    set the status to 304 if the client has the same content."""
+    for key, value in _cache_headers(mime_type, etag, mtime):
+        handler.set_header(key, value)
+    headers = handler.request.headers
+    if _is_not_modified(headers.get('If-None-Match'),
+                        headers.get('If-Modified-Since'), etag, mtime):
+        handler.set_status(304)
+        return False
+    return True
+
+
 def wsgi_app(environ, start_response):
     path = environ['PATH_INFO'].lstrip('/')
     abspath = translate_path(path)
-    headers = []
-    if os.path.isdir(abspath) or not os.path.exists(abspath):
-        headers.append(('Content-type', 'text/html'))
-    else:
+    if os.path.isfile(abspath):
         mime_type, encoding = mimetypes.guess_type(abspath)
-        if mime_type:
-            headers.append(('Content-type', mime_type))
-        else:
-            headers.append(('Content-type', 'application/octet-stream'))
-
+        status, headers, body = _serve_file(
+            abspath, mime_type or 'application/octet-stream',
+            lambda key: environ.get('HTTP_' + key.upper().replace('-', '_'))
+        )
+        logging.info(headers)
+        start_response(_status[status], headers)
+        return body or []
+
+    headers = [('Content-type', 'text/html')]
     logging.info(headers)
     body = _read(abspath)
-
     if body is None:
         start_response('404 Not Found', headers)
-    else:
-        start_response('200 OK', headers)
-        yield body
+        return []
+
+    etag = _etag(body)
+    headers.extend(_cache_headers('text/html', etag))
+    if _is_not_modified(environ.get('HTTP_IF_NONE_MATCH'), None, etag):
+        start_response('304 Not Modified', headers)
+        return []
+    start_response('200 OK', headers)
+    return [body]
 
 
 class LiveReloadJSHandler(RequestHandler):
@@ -132,8 +393,9 @@ class LiveReloadJSHandler(RequestHandler):
 
 class LiveReloadHandler(WebSocketHandler):
     waiters = set()
-    _modified_times = {}
-    _watch_running = False
+    _watcher = None
+    _changes = ChangeSet()
+    _timeout = None
 
     def allow_draft76(self):
         return True
@@ -175,31 +437,71 @@ class LiveReloadHandler(WebSocketHandler):
         if message.command == 'info' and 'url' in message:
             logging.info('Browser Connected: %s' % message.url)
             LiveReloadHandler.waiters.add(self)
-            if not LiveReloadHandler._watch_running:
-                LiveReloadHandler._watch_running = True
+            if LiveReloadHandler._watcher is None:
                 logging.info('Start watching changes')
-                tornado.ioloop.PeriodicCallback(self.watch_tasks, 500).start()
+                self.start_watching()
 
-    def watch_tasks(self):
+    def start_watching(self):
         if g.output_directory != ROOT:
             # not a liquidluck project
-            if self._is_changed(ROOT):
-                self.reload_browser()
-            return
+            paths = [ROOT]
+        else:
+            paths = [g.source_directory, g.theme_directory]
+        watcher = get_watcher(paths, self._is_watched)
+        LiveReloadHandler._watcher = watcher
+
+        ioloop = tornado.ioloop.IOLoop.instance()
+        if watcher.fileno() is None:
+            tornado.ioloop.PeriodicCallback(
+                lambda: self.on_changes(watcher.changes()), 500
+            ).start()
+        else:
+            ioloop.add_handler(
+                watcher.fileno(),
+                lambda fd, events: self.on_changes(watcher.changes()),
+                ioloop.READ
+            )
 
-        if self._is_changed(g.source_directory):
-            # clean posts
-            g.public_posts = []
-            g.secure_posts = []
-            g.pure_files = []
-            g.pure_pages = []
-            g.resource = {}
+    def on_changes(self, changes):
+        """Collect the changes, and wait for more changes before
+        building the site."""
+        if not changes:
+            return
+        for path, event in changes:
+            logging.info('file %s: %s' % (event, path))
+        LiveReloadHandler._changes.add(changes)
+        self._schedule()
+
+    def _schedule(self):
+        ioloop = tornado.ioloop.IOLoop.instance()
+        if LiveReloadHandler._timeout is not None:
+            ioloop.remove_timeout(LiveReloadHandler._timeout)
+        LiveReloadHandler._timeout = ioloop.add_timeout(
+            LiveReloadHandler._changes.deadline(), self._flush
+        )
+
+    def _flush(self):
+        LiveReloadHandler._timeout = None
+        if not LiveReloadHandler._changes.is_ready():
+            self._schedule()
+            return
+        changes = LiveReloadHandler._changes.pop()
+        if changes:
+            self.watch_tasks(changes)
 
-            load_posts(settings.config['source'])
-            write_posts()
+    def watch_tasks(self, changes):
+        if g.output_directory != ROOT:
+            # not a liquidluck project
             self.reload_browser()
+            return
 
-        if self._is_changed(g.theme_directory):
+        source = self._changes_in(changes, g.source_directory)
+        theme = self._changes_in(changes, g.theme_directory)
+
+        if source or theme:
+            if source:
+                update_posts(source)
+            #: only the pages that changed are written
             write_posts()
             self.reload_browser()
 
@@ -217,54 +519,52 @@ class LiveReloadHandler(WebSocketHandler):
                 logging.error('Error sending message', exc_info=True)
                 LiveReloadHandler.waiters.remove(waiter)
 
-    def _is_changed(self, path):
-        def is_file_changed(path):
-            if not os.path.isfile(path):
-                return False
-
-            _, ext = os.path.splitext(path)
-            theme = settings.theme.get('vars') or {}
-
-            if g.output_directory == g.source_directory:
-                matches = theme.get('reload_match') or []
-                matches.extend(['.md', '.mkd', '.markdown', '.rst'])
-                if ext not in matches:
-                    return False
-            elif os.path.abspath(g.output_directory) in \
-                    os.path.abspath(path):
-                return False
-
-            modified = int(os.stat(path).st_mtime)
+    def _changes_in(self, changes, directory):
+        directory = os.path.abspath(directory)
+        prefix = directory.rstrip(os.sep) + os.sep
+        return [o for o in changes
+                if o[0] == directory or o[0].startswith(prefix)]
 
-            if path not in self._modified_times:
-                self._modified_times[path] = modified
-                return False
+    def _is_watched(self, path):
+        _, ext = os.path.splitext(path)
+        theme = settings.theme.get('vars') or {}
 
-            if path in self._modified_times and \
-               self._modified_times[path] == modified:
+        if g.output_directory == g.source_directory:
+            matches = list(theme.get('reload_match') or [])
+            matches.extend(['.md', '.mkd', '.markdown', '.rst'])
+            if ext not in matches:
                 return False
-
-            self._modified_times[path] = modified
-            logging.info('file changed: %s' % path)
-            return True
-
-        for f in walk_dir(path):
-            if is_file_changed(f):
-                return True
-
-        return False
+        elif os.path.abspath(g.output_directory) in os.path.abspath(path):
+            return False
+        return True
 
 
 class IndexHandler(RequestHandler):
+    @coroutine
     def get(self, path='/'):
         abspath = os.path.join(os.path.abspath(ROOT), path.lstrip('/'))
+        if g.memory is not None:
+            abspath = _memory_path(path) or abspath
         mime_type, encoding = mimetypes.guess_type(abspath)
         if not mime_type:
             mime_type = 'text/html'
 
+        in_memory = g.memory is not None and abspath in g.memory
+        if mime_type != 'text/html' and not in_memory and \
+           os.path.isfile(abspath):
+            #: images, videos and others are sent as they are
+            yield _send_file(self, abspath, mime_type)
+            return
+
         self.set_header('Content-Type', mime_type)
 
-        body = _read(abspath)
+        mtime = None
+        if in_memory:
+            body = g.memory.get(abspath)
+        else:
+            body = _read(abspath)
+            if os.path.isfile(abspath):
+                mtime = os.stat(abspath).st_mtime
 
         if body is None:
             self.send_error(404)
@@ -276,39 +576,45 @@ class IndexHandler(RequestHandler):
             )
         # disable google analytics
         body = body.replace('google-analytics.com/ga.js', '')
-        self.write(body)
+        if _check_modified(self, mime_type, _etag(body), mtime):
+            self.write(body)
 
 
 class ThemeStaticHandler(RequestHandler):
+    @coroutine
     def get(self, filepath):
         abspath = os.path.join(g.theme_directory, 'static', filepath)
         mime_type, encoding = mimetypes.guess_type(abspath)
         if not mime_type:
             mime_type = 'text/html'
 
-        self.set_header('Content-Type', mime_type)
-        if not os.path.exists(abspath):
+        if not os.path.isfile(abspath):
             self.send_error(404)
             return
-
-        f = open(abspath)
-        for line in f:
-            self.write(line)
-        f.close()
+        yield _send_file(self, abspath, mime_type)
 
 
-def start_server(debug=False):
+def start_server(debug=False, memory=False):
     if debug:
         variables = settings.theme.get('vars', {})
         variables.update({'debug': True})
         settings.theme['vars'] = variables
     if RequestHandler is object:
         logging.info('Start server at %s:%s' % (HOST, PORT))
-        make_server(HOST, int(PORT), wsgi_app).serve_forever()
+        make_server(
+            HOST, int(PORT), wsgi_app, handler_class=SendfileRequestHandler
+        ).serve_forever()
     else:
         import tornado.web
         if g.output_directory == ROOT:
             #: if this is a liquidluck project, build the site
+            if g.cache is None:
+                #: keep the records in memory, debug pages are never
+                #: shared with the builds on disk
+                g.cache = BuildCache(None)
+            if memory:
+                #: pages are rendered when they are requested
+                g.memory = MemoryOutput()
             load_posts(settings.config['source'])
             write_posts()
             logging.info('Theme directory: %s' % g.theme_directory)
@@ -0,0 +1,314 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+Watch directories for changes, used by the livereload server.
+
+On Linux the watcher is built on inotify, the kernel tells which files are
+changed, nothing is done when nothing changes. On other systems, or when
+inotify is not available, the directories are walked and every file is
+stat'ed to find the changes.
+
+Both watchers return the changes as a list of ``(path, event)``, event is
+one of ``created``, ``modified``, ``deleted``. Inotify may also return
+``(directory, 'overflow')`` when the kernel queue is full, which means
+anything in the directory may have changed.
+
+A burst of changes, like a ``git checkout``, is collected by
+:class:`ChangeSet` into one batch::
+
+    watcher = get_watcher([source, theme])
+    changes = ChangeSet(delay=0.2)
+
+    changes.add(watcher.changes())
+    if changes.is_ready():
+        rebuild(changes.pop())
+
+:copyright: (c) 2012 by Hsiaoming Yang (aka lepture)
+:license: BSD
+'''
+
+import os
+import sys
+import time
+import errno
+import struct
+import logging
+from liquidluck.utils import walk_dir
+
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+IN_CLOEXEC = 0x00080000
+IN_NONBLOCK = 0x00000800
+
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | \
+    IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR
+
+_event_struct = struct.Struct('iIII')
+
+_ignored_dirs = ('.git', '.hg', '.svn')
+
+
+def _encode(path):
+    if isinstance(path, bytes):
+        return path
+    return path.encode(sys.getfilesystemencoding())
+
+
+def _decode(name):
+    if str is bytes:
+        return name
+    return name.decode(sys.getfilesystemencoding())
+
+
+class PollingWatcher(object):
+    """Walk the directories to find the changes."""
+
+    def __init__(self, paths, match=None):
+        self.paths = paths
+        #: only the files ``match(path)`` returns True are watched
+        self.match = match
+        self._modified_times = self._scan()
+
+    def fileno(self):
+        return None
+
+    def close(self):
+        pass
+
+    def _scan(self):
+        modified_times = {}
+        for path in self.paths:
+            for filepath in walk_dir(path):
+                if self.match and not self.match(filepath):
+                    continue
+                try:
+                    modified_times[filepath] = os.stat(filepath).st_mtime
+                except OSError:
+                    continue
+        return modified_times
+
+    def changes(self):
+        modified_times = self._scan()
+        changes = []
+        for filepath, mtime in modified_times.items():
+            if filepath not in self._modified_times:
+                changes.append((filepath, 'created'))
+            elif self._modified_times[filepath] != mtime:
+                changes.append((filepath, 'modified'))
+        for filepath in self._modified_times:
+            if filepath not in modified_times:
+                changes.append((filepath, 'deleted'))
+        self._modified_times = modified_times
+        return changes
+
+
+class InotifyWatcher(object):
+    """Watch the directories with Linux inotify.
+
+    Raises OSError when inotify is not available.
+    """
+
+    def __init__(self, paths, match=None):
+        import ctypes
+        import ctypes.util
+
+        self.paths = paths
+        self.match = match
+
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, 'inotify is only available on linux')
+        libc = ctypes.CDLL(
+            ctypes.util.find_library('c') or 'libc.so.6', use_errno=True
+        )
+        try:
+            self._add_watch = libc.inotify_add_watch
+            self._rm_watch = libc.inotify_rm_watch
+            fd = libc.inotify_init1(IN_CLOEXEC | IN_NONBLOCK)
+        except AttributeError:
+            raise OSError(errno.ENOSYS, 'inotify is not supported')
+        if fd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code))
+        self._fd = fd
+
+        #: watch descriptor -> directory
+        self._watches = {}
+        for path in paths:
+            self._watch_tree(path)
+
+    def fileno(self):
+        return self._fd
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _watch_tree(self, path):
+        """Watch the directory and the directories in it."""
+        import ctypes
+
+        for root, dirs, files in os.walk(path):
+            for name in _ignored_dirs:
+                if name in dirs:
+                    dirs.remove(name)
+            wd = self._add_watch(self._fd, _encode(root), WATCH_MASK)
+            if wd < 0:
+                code = ctypes.get_errno()
+                if code == errno.ENOSPC:
+                    raise OSError(code, 'inotify watch limit reached')
+                #: the directory is removed
+                continue
+            self._watches[wd] = root
+
+    def _unwatch_tree(self, path):
+        prefix = path.rstrip(os.sep) + os.sep
+        for wd, root in list(self._watches.items()):
+            if root == path or root.startswith(prefix):
+                self._rm_watch(self._fd, wd)
+                del self._watches[wd]
+
+    def _read(self):
+        data = b''
+        while True:
+            try:
+                chunk = os.read(self._fd, 65536)
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    break
+                if e.errno == errno.EINTR:
+                    continue
+                raise
+            if not chunk:
+                break
+            data += chunk
+        return data
+
+    def _events(self, data):
+        offset = 0
+        size = _event_struct.size
+        while offset + size <= len(data):
+            wd, mask, cookie, length = _event_struct.unpack_from(data, offset)
+            name = data[offset + size:offset + size + length].rstrip(b'\0')
+            offset += size + length
+            yield wd, mask, _decode(name)
+
+    def changes(self):
+        changes = []
+        for wd, mask, name in self._events(self._read()):
+            if mask & IN_Q_OVERFLOW:
+                logging.warn('Too many changes, inotify queue overflowed')
+                changes.extend((path, 'overflow') for path in self.paths)
+                continue
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+
+            root = self._watches.get(wd)
+            if root is None or not name:
+                continue
+            path = os.path.join(root, name)
+
+            if mask & IN_ISDIR:
+                if name in _ignored_dirs:
+                    continue
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    try:
+                        self._watch_tree(path)
+                    except OSError as e:
+                        logging.warn('Can not watch %s: %s' % (path, e))
+                    changes.extend(
+                        (filepath, 'created') for filepath in walk_dir(path)
+                        if not self.match or self.match(filepath)
+                    )
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    self._unwatch_tree(path)
+                    changes.append((path, 'deleted'))
+                continue
+
+            if self.match and not self.match(path):
+                continue
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                changes.append((path, 'created'))
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                changes.append((path, 'deleted'))
+            elif mask & (IN_MODIFY | IN_CLOSE_WRITE):
+                changes.append((path, 'modified'))
+        return changes
+
+
+def get_watcher(paths, match=None):
+    """Returns an inotify watcher if possible, or a polling watcher."""
+    paths = [os.path.abspath(path) for path in paths if os.path.isdir(path)]
+    try:
+        watcher = InotifyWatcher(paths, match)
+        logging.debug('Watch changes with inotify')
+        return watcher
+    except (OSError, ImportError) as e:
+        logging.debug('Watch changes by polling: %s' % e)
+        return PollingWatcher(paths, match)
+
+
+class ChangeSet(object):
+    """Collect changes until nothing has changed for ``delay`` seconds,
+    but no longer than ``timeout`` seconds."""
+
+    def __init__(self, delay=0.2, timeout=2):
+        self.delay = delay
+        self.timeout = timeout
+        #: path -> event
+        self.changes = {}
+        self._first = None
+        self._last = None
+
+    def __len__(self):
+        return len(self.changes)
+
+    def add(self, changes, now=None):
+        if not changes:
+            return
+        now = now or time.time()
+        if self._first is None:
+            self._first = now
+        self._last = now
+
+        for path, event in changes:
+            previous = self.changes.get(path)
+            if previous == 'created' and event == 'modified':
+                continue
+            if previous == 'created' and event == 'deleted':
+                del self.changes[path]
+                continue
+            if previous == 'deleted' and event == 'created':
+                event = 'modified'
+            if previous == 'overflow':
+                continue
+            self.changes[path] = event
+
+    def deadline(self):
+        """When the changes are ready, None if there is no change."""
+        if self._first is None:
+            return None
+        return min(self._last + self.delay, self._first + self.timeout)
+
+    def is_ready(self, now=None):
+        deadline = self.deadline()
+        return deadline is not None and (now or time.time()) >= deadline
+
+    def pop(self):
+        """Returns the changes as a sorted list of ``(path, event)``."""
+        changes = sorted(self.changes.items())
+        self.changes = {}
+        self._first = self._last = None
+        return changes
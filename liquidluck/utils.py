@@ -4,6 +4,7 @@
 import re
 import os
 import shutil
+import hashlib
 import datetime
 
 
@@ -57,6 +58,15 @@ def walk_dir(dest):
             yield path
 
 
+def file_hash(filepath):
+    md5 = hashlib.md5()
+    f = open(filepath, 'rb')
+    for chunk in iter(lambda: f.read(65536), b''):
+        md5.update(chunk)
+    f.close()
+    return md5.hexdigest()
+
+
 def copy_to(source, dest):
     if os.path.exists(dest) and \
        os.stat(source).st_mtime <= os.stat(dest).st_mtime:
@@ -98,11 +108,58 @@ def cjk_nowrap(text):
     return text
 
 
+_iso_datetime_re = re.compile(
+    r'^(\d{4})-(\d{1,2})-(\d{1,2})'
+    r'(?:([ T])(\d{1,2}):(\d{1,2})(?::(\d{1,2}))?)?\Z'
+)
+_compact_datetime_re = re.compile(
+    r'^(\d{4})(\d{2})(\d{2})(?: (\d{1,2}):(\d{1,2})(?::(\d{1,2}))?)?\Z'
+)
+_datetime_cache = {}
+
+
+def _parse_datetime(value):
+    """Parse the common formats without strptime, returns None if
+    the value is not in these formats."""
+    m = _iso_datetime_re.match(value)
+    if m:
+        year, month, day, sep, hour, minute, second = m.groups()
+        if sep == 'T' and second:
+            #: not a supported format
+            return None
+    else:
+        m = _compact_datetime_re.match(value)
+        if not m:
+            return None
+        year, month, day, hour, minute, second = m.groups()
+
+    try:
+        return datetime.datetime(
+            int(year), int(month), int(day),
+            int(hour or 0), int(minute or 0), int(second or 0),
+        )
+    except ValueError:
+        return None
+
+
 def to_datetime(value):
     if not value:
         return None
     if isinstance(value, datetime.datetime):
         return value
+    if value in _datetime_cache:
+        return _datetime_cache[value]
+
+    date = _parse_datetime(value)
+    if date is None:
+        date = _strptime(value)
+    if len(_datetime_cache) > 10000:
+        _datetime_cache.clear()
+    _datetime_cache[value] = date
+    return date
+
+
+def _strptime(value):
     supported_formats = [
         '%a %b %d %H:%M:%S %Y',
         '%Y-%m-%d %H:%M:%S',
@@ -10,13 +10,15 @@ Writer, write your content to html.
 
 import os
 import re
+import hashlib
 import datetime
 import logging
-from jinja2 import Environment, FileSystemLoader
+import jinja2
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache
 from jinja2 import contextfilter
 import liquidluck
 from liquidluck.utils import import_object, get_relative_base
-from liquidluck.utils import to_unicode, utf8
+from liquidluck.utils import to_unicode, utf8, file_hash
 
 # blog settings
 from liquidluck.options import settings
@@ -25,6 +27,8 @@ from liquidluck.options import settings
 from liquidluck.options import g
 from liquidluck.filters import xmldatetime, feed_updated, wiki_link
 from liquidluck.filters import content_url, tag_url, year_url, static_url
+from liquidluck.profiler import profile, reset_profiler
+from liquidluck.taxonomy import get_taxonomy
 
 
 class BaseWriter(object):
@@ -36,18 +40,27 @@ class BaseWriter(object):
         raise NotImplementedError
 
     def run(self):
+        name = self.__class__.__name__
         try:
-            self.start()
+            with profile('writer', name):
+                self.start()
         except Exception as e:
             logging.error(e)
             if g.interrupt:
                 raise e
 
-        name = self.__class__.__name__
         logging.info('%s Finished' % name)
 
     def write(self, content, destination):
+        """Write content to destination, returns False if the file is
+        not written because it has the same content already.
+        """
         destination = destination.replace(' ', '-')
+        content = utf8(content)
+        if settings.config.get('skip_unchanged') and \
+           is_unchanged(content, destination):
+            return False
+
         folder = os.path.split(destination)[0]
         # on Mac OSX, `folder` == `FOLDER`
         # then make sure destination is lowercase
@@ -55,15 +68,13 @@ class BaseWriter(object):
             os.makedirs(folder)
 
         f = open(destination, 'w')
-        f.write(utf8(content))
+        f.write(content)
         f.close()
-        return
+        return True
 
     def render(self, params, template, destination):
         filepath = destination[len(g.output_directory) + 1:]
         filepath = filepath.lower()
-        logging.debug('write %s' % filepath)
-        tpl = g.jinja.get_template(template)
 
         writer = {
             'class': self.__class__.__name__,
@@ -71,10 +82,49 @@ class BaseWriter(object):
             'filepath': filepath,
         }
         params['writer'] = writer
-        html = tpl.render(params)
-        self.write(html, os.path.join(g.output_directory, filepath))
+        destination = os.path.join(g.output_directory, filepath)
+        destination = destination.replace(' ', '-')
+        signature = None
+        if g.cache:
+            signature = g.cache.signature(template, params)
+        if g.memory is not None:
+            #: rendered when it is requested
+            g.memory.add(self, params, template, destination, signature)
+            return
+        if g.cache:
+            if g.cache.is_fresh(destination, signature):
+                logging.debug('skip %s' % filepath)
+                g.cache.set_output(destination, signature)
+                g.stats['skipped'] += 1
+                return
+
+        if g.render_queue is not None:
+            #: rendered later by ``render_jobs``
+            g.render_queue.append(
+                (self, params, template, destination, signature)
+            )
+            return
+
+        if self.render_to(params, template, destination):
+            g.stats['written'] += 1
+        else:
+            g.stats['skipped'] += 1
+        if g.cache:
+            g.cache.set_output(destination, signature)
         return
 
+    def render_to(self, params, template, destination):
+        filepath = destination[len(g.output_directory) + 1:]
+        logging.debug('write %s' % filepath)
+        html = self.render_html(params, template)
+        with profile('disk', 'write'):
+            return self.write(html, destination)
+
+    def render_html(self, params, template):
+        with profile('template', template):
+            tpl = g.jinja.get_template(template)
+            return tpl.render(params)
+
     def get(self, key, value=None):
         variables = settings.writer.get('vars')
         if isinstance(variables, dict):
@@ -133,6 +183,122 @@ class Pagination(object):
         return self.total_items[start:end]
 
 
+def is_unchanged(content, destination):
+    """Compare content with the existing file, by size first,
+    then by md5 hash."""
+    try:
+        if os.path.getsize(destination) != len(content):
+            return False
+    except OSError:
+        return False
+    return file_hash(destination) == hashlib.md5(content).hexdigest()
+
+
+def _render_job(index, collect=True):
+    writer, params, template, destination, signature = g.render_queue[index]
+    try:
+        written = writer.render_to(params, template, destination)
+    except Exception as e:
+        logging.error(e)
+        if g.interrupt:
+            raise e
+        written = None
+    return (index, written, collect and g.profiler and g.profiler.collect(),
+            collect and g.static_cache and g.static_cache.collect())
+
+
+def render_jobs(jobs, processes=1):
+    """Render the jobs collected in ``g.render_queue``. Jobs are rendered
+    in a pool of processes, each process has its own copy of the jinja
+    environment, which is forked from the main process.
+    """
+    #: keep the last job of every destination, the same as a serial build
+    latest = {}
+    for index, job in enumerate(jobs):
+        latest[job[3]] = index
+    g.render_queue = [jobs[index] for index in sorted(latest.values())]
+
+    try:
+        total = len(g.render_queue)
+        if processes > 1 and total > 1 and hasattr(os, 'fork'):
+            import multiprocessing
+            pool = multiprocessing.Pool(processes, reset_profiler)
+            chunksize = max(1, total // (processes * 4))
+            try:
+                results = list(pool.imap_unordered(
+                    _render_job, range(total), chunksize
+                ))
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            results = [_render_job(index, False) for index in range(total)]
+
+        for index, written, records, statics in results:
+            if records:
+                g.profiler.merge(records)
+            if statics:
+                g.static_cache.merge(statics)
+            if written is None:
+                continue
+            if written:
+                g.stats['written'] += 1
+            else:
+                g.stats['skipped'] += 1
+            destination, signature = g.render_queue[index][3:]
+            if g.cache:
+                g.cache.set_output(destination, signature)
+    finally:
+        g.render_queue = None
+
+
+class MemoryOutput(object):
+    """Keep the pages in memory instead of writing them, for the server.
+
+    Writers add their pages with the params, a page is rendered when it
+    is requested. A rendered page is kept until its signature changes.
+    """
+
+    def __init__(self):
+        #: destination -> (writer, params, template, signature)
+        self.jobs = {}
+        #: destination -> (signature, content)
+        self.pages = {}
+
+    def __contains__(self, destination):
+        return destination in self.jobs
+
+    def reset(self):
+        """Start another build, the pages are added again."""
+        self.jobs = {}
+
+    def add(self, writer, params, template, destination, signature):
+        self.jobs[destination] = (writer, params, template, signature)
+
+    def prune(self):
+        """Remove the rendered pages that are changed or gone."""
+        for destination in list(self.pages.keys()):
+            job = self.jobs.get(destination)
+            if not job or job[3] is None or \
+               job[3] != self.pages[destination][0]:
+                del self.pages[destination]
+
+    def get(self, destination):
+        """Returns the content of the page in bytes, or None."""
+        job = self.jobs.get(destination)
+        if job is None:
+            return None
+        writer, params, template, signature = job
+        page = self.pages.get(destination)
+        if page and signature is not None and page[0] == signature:
+            return page[1]
+
+        logging.debug('render %s' % destination)
+        content = utf8(writer.render_html(params, template))
+        self.pages[destination] = (signature, content)
+        return content
+
+
 def find_theme():
     theme_name = settings.theme.get('name', 'default')
     theme_gallery = [
@@ -147,6 +313,25 @@ def find_theme():
     raise Exception("Can't find theme: %s" % theme_name)
 
 
+def load_bytecode_cache(extensions):
+    """Compiled templates are kept in ``template_cache`` of config, which
+    is the ``templates`` folder of the build cache by default."""
+    directory = settings.config.get('template_cache')
+    if directory is None and g.cache_directory:
+        directory = os.path.join(g.cache_directory, 'templates')
+    if not directory:
+        return None
+
+    #: the compiled code depends on jinja and the extensions
+    key = hashlib.md5(utf8(repr([
+        jinja2.__version__, [repr(o) for o in extensions]
+    ]))).hexdigest()[:8]
+    directory = os.path.join(os.path.abspath(directory), key)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    return FileSystemBytecodeCache(directory)
+
+
 def load_jinja():
     #: prepare loaders
     #: loaders = ['_templates', theme]
@@ -172,10 +357,12 @@ def load_jinja():
         loaders.append(default_template)
 
     #: init jinja
+    extensions = settings.writer.get('extensions') or []
     jinja = Environment(
         loader=FileSystemLoader(loaders),
         autoescape=False,  # blog don't need autoescape
-        extensions=settings.writer.get('extensions') or [],
+        extensions=extensions,
+        bytecode_cache=load_bytecode_cache(extensions),
     )
     #: initialize globals
     jinja.globals = {}
@@ -246,6 +433,7 @@ def load_jinja():
     #: load resource
     g.resource['posts'] = g.public_posts
     g.resource['pages'] = g.pure_pages
+    g.resource['taxonomy'] = get_taxonomy()
     jinja.globals.update({
         'resource': g.resource,
     })
@@ -254,33 +442,65 @@ def load_jinja():
     return jinja
 
 
-def get_post_slug(post, slug_format):
-    regex = re.compile(r'\{\{(.*?)\}\}')
+_slug_re = re.compile(r'\{\{(.*?)\}\}')
+_slug_formats = {}
 
-    def replace(m):
-        key = m.group(1)
-        bits = key.split('.')
-        value = post
 
-        for bit in bits:
-            if not hasattr(value, bit):
-                return ''
-            value = getattr(value, bit)
+def compile_slug_format(slug_format):
+    """Split ``slug_format`` into text and attribute chains, e.g.
+    ``['', ('date', 'year'), '/', ('filename',), '.html']``."""
+    parts = _slug_formats.get(slug_format)
+    if parts is None:
+        parts = []
+        start = 0
+        for m in _slug_re.finditer(slug_format):
+            parts.append(slug_format[start:m.start()])
+            parts.append(tuple(m.group(1).split('.')))
+            start = m.end()
+        parts.append(slug_format[start:])
+        _slug_formats[slug_format] = parts
+    return parts
 
-        if not value:
+
+def _slug_value(post, bits):
+    value = post
+    for bit in bits:
+        if not hasattr(value, bit):
             return ''
+        value = getattr(value, bit)
 
-        if isinstance(value, int) and value < 10:
-            #: fix on month and date value
-            value = '0%d' % value
-        return to_unicode(value)
+    if not value:
+        return ''
 
-    slug = regex.sub(replace, slug_format)
-    slug = slug.lstrip('/').replace('//', '/').replace(' ', '-')
+    if isinstance(value, int) and value < 10:
+        #: fix on month and date value
+        value = '0%d' % value
+    return to_unicode(value)
+
+
+def get_post_slug(post, slug_format):
     prefix = settings.site.get('prefix', '').rstrip('/')
+    #: the slug is kept on the post, a post that is read again is
+    #: a new post, and changed settings make a new key
+    key = (slug_format, prefix)
+    memo = getattr(post, '_slug', None)
+    if memo and memo[0] == key:
+        return memo[1]
+
+    bits = []
+    for part in compile_slug_format(slug_format):
+        if isinstance(part, tuple):
+            part = _slug_value(post, part)
+        bits.append(part)
+    slug = ''.join(bits)
+    slug = slug.lstrip('/').replace('//', '/').replace(' ', '-')
     slug = slug.lower()
     if prefix:
-        return '%s/%s' % (prefix, slug)
+        slug = '%s/%s' % (prefix, slug)
+    try:
+        post._slug = (key, slug)
+    except AttributeError:
+        pass
     return slug
 
 
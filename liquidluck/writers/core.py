@@ -6,6 +6,7 @@ from liquidluck.options import g, settings
 from liquidluck.utils import UnicodeDict, walk_dir, copy_to
 from liquidluck.writers.base import BaseWriter, Pagination
 from liquidluck.writers.base import get_post_destination
+from liquidluck.taxonomy import get_taxonomy
 
 
 class PostWriter(BaseWriter):
@@ -136,15 +137,8 @@ class YearWriter(ArchiveWriter):
     writer_name = 'year'
 
     def __init__(self):
-        self._posts = {}
         self._template = self.get('year_template', 'archive.html')
-
-        for post in g.public_posts:
-            if post.date.year not in self._posts:
-                self._posts[post.date.year] = [post]
-            else:
-                self._posts[post.date.year].append(post)
-
+        self._posts = get_taxonomy().years
         g.resource['year'] = self._posts
 
     def start(self):
@@ -180,16 +174,8 @@ class TagWriter(ArchiveWriter):
     writer_name = 'tag'
 
     def __init__(self):
-        self._posts = {}
         self._template = self.get('tag_template', 'archive.html')
-
-        for post in g.public_posts:
-            for tag in post.tags:
-                if tag not in self._posts:
-                    self._posts[tag] = [post]
-                else:
-                    self._posts[tag].append(post)
-
+        self._posts = get_taxonomy().tags
         g.resource['tag'] = self._posts
 
     def start(self):
@@ -223,19 +209,8 @@ class TagCloudWriter(ArchiveWriter):
     writer_name = 'tagcloud'
 
     def __init__(self):
-        self._posts = {}
         self._template = self.get('tagcloud_template', 'tagcloud.html')
-        if 'tag' in g.resource:
-            self._posts = g.resource['tag']
-            return
-
-        for post in g.public_posts:
-            for tag in post.tags:
-                if tag not in self._posts:
-                    self._posts[tag] = [post]
-                else:
-                    self._posts[tag].append(post)
-
+        self._posts = get_taxonomy().tags
         g.resource['tag'] = self._posts
 
     def start(self):
@@ -249,17 +224,9 @@ class CategoryWriter(ArchiveWriter):
     writer_name = 'category'
 
     def __init__(self):
-        self._posts = {}
         self._template = self.get('category_template', 'archive.html')
         self._title = self.get('category_title', {})
-
-        for post in g.public_posts:
-            if post.category:
-                if post.category not in self._posts:
-                    self._posts[post.category] = [post]
-                else:
-                    self._posts[post.category].append(post)
-
+        self._posts = get_taxonomy().categories
         g.resource['category'] = self._posts
 
     def start(self):
@@ -293,20 +260,9 @@ class CategoryFeedWriter(ArchiveWriter):
     writer_name = 'category_feed'
 
     def __init__(self):
-        self._posts = {}
         self._template = self.get('category_feed_template', 'feed.xml')
         self._output = self.get('category_feed_output', 'feed.xml')
-
-        if 'category' in g.resource:
-            self._posts = g.resource['category']
-            return
-
-        for post in g.public_posts:
-            if post.category:
-                if post.category not in self._posts:
-                    self._posts[post.category] = [post]
-                else:
-                    self._posts[post.category].append(post)
+        self._posts = get_taxonomy().categories
 
     def start(self):
         for category in self._posts:
@@ -4,9 +4,38 @@
 """
 
 import os
+import heapq
+from collections import defaultdict
 from liquidluck.options import g, settings
 from liquidluck.writers.base import BaseWriter
 from liquidluck.writers.base import get_post_destination
+from liquidluck.taxonomy import get_taxonomy
+
+
+class RelatedPost(object):
+    """A related post with its priority to the post of the page, other
+    attributes are the ones of the post. The priority is not set on the
+    post, which is shared by every page that lists it."""
+    __slots__ = ('post', 'related_priority')
+
+    def __init__(self, post, related_priority):
+        self.post = post
+        self.related_priority = related_priority
+
+    def __getattr__(self, key):
+        if key.startswith('__') or key in self.__slots__:
+            #: keep pickle and copy working
+            raise AttributeError(key)
+        return getattr(self.post, key)
+
+    def __eq__(self, other):
+        if isinstance(other, RelatedPost):
+            return (self.post, self.related_priority) == \
+                (other.post, other.related_priority)
+        return NotImplemented
+
+    def __ne__(self, other):
+        return not self == other
 
 
 class PostWriter(BaseWriter):
@@ -26,6 +55,9 @@ class PostWriter(BaseWriter):
 
     def __init__(self):
         self._template = self.get('post_template', 'post.html')
+        self._posts = None
+        self._index = None
+        self._titles = None
 
     def start(self):
         for index, post in enumerate(g.public_posts):
@@ -54,22 +86,41 @@ class PostWriter(BaseWriter):
         if index < total - 1:
             older = g.public_posts[index + 1]
 
-        def get_related_by_tags():
-            tags = set(post.tags)
-            base = len(post.tags)
-
-            for p in g.public_posts:
-                prior = len(tags - set(p.tags))
-                if prior < base and p.title != post.title:
-                    p.related_priority = base - prior
-                    yield p
-
-        related = sorted(get_related_by_tags(),
-                         key=lambda o: o.related_priority,
-                         reverse=True)
         relation = {
             'newer': newer,
             'older': older,
-            'related': related[:4],
+            'related': self._get_related(post),
         }
         return relation
+
+    def _get_related(self, post, count=4):
+        """Posts that share the most tags with ``post``, newer posts come
+        first when they share the same number of tags."""
+        taxonomy = get_taxonomy()
+        if self._index is None or self._posts is not taxonomy.posts:
+            self._posts = taxonomy.posts
+            positions = dict((id(p), i) for i, p in enumerate(self._posts))
+            #: tag -> positions of posts in public posts
+            self._index = dict(
+                (tag, [positions[id(p)] for p in posts])
+                for tag, posts in taxonomy.tags.items()
+            )
+            self._titles = defaultdict(list)
+            for i, p in enumerate(self._posts):
+                self._titles[p.title].append(i)
+
+        #: count shared tags through the posts of every tag
+        scores = defaultdict(int)
+        for tag in set(post.tags):
+            for i in self._index.get(tag, ()):
+                scores[i] += 1
+        for i in self._titles.get(post.title, ()):
+            scores.pop(i, None)
+
+        related = []
+        best = heapq.nsmallest(
+            count, ((-score, i) for i, score in scores.iteritems())
+        )
+        for score, i in best:
+            related.append(RelatedPost(self._posts[i], -score))
+        return related
@@ -8,6 +8,7 @@ config = {
     'source': 'post',
     'output': 'build/deploy',
     'static': 'build/deploy/static',
+    'cache': 'build/cache',
 }
 
 #: active readers
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import tempfile
+from liquidluck.cache import BuildCache, StaticCache, stable_repr
+from liquidluck.readers.base import Post
+from liquidluck.readers.markdown import MarkdownReader
+from liquidluck.writers.extends import PostWriter
+from liquidluck.options import g
+
+ROOT = os.path.abspath(os.path.dirname(__file__))
+
+
+def test_stable_repr():
+    assert stable_repr({'b': 1, 'a': [1, 2]}) == "{'a': [1, 2], 'b': 1}"
+
+
+class TestBuildCache(object):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filepath = os.path.join(self.directory, 'post.md')
+        shutil.copy(
+            os.path.join(ROOT, 'source/post/demo-markdown-1.md'),
+            self.filepath
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_post(self):
+        cache = BuildCache(self.directory)
+        assert cache.get_post(self.filepath) == (False, None)
+        post = MarkdownReader(self.filepath).render()
+        cache.set_post(self.filepath, post)
+        cache.save()
+
+        cache = BuildCache(self.directory)
+        cache.load()
+        cached, post = cache.get_post(self.filepath)
+        assert cached is True
+        assert post.title == 'demo'
+        assert 'first line' in post.content
+
+        f = open(self.filepath, 'a')
+        f.write('\nnew line\n')
+        f.close()
+        cache = BuildCache(self.directory)
+        cache.load()
+        assert cache.get_post(self.filepath) == (False, None)
+
+    def test_relations(self):
+        posts = [
+            Post(self.filepath, '', title='%d' % i,
+                 meta={'tags': 'x', 'date': '2012-12-12'})
+            for i in range(1200)
+        ]
+        public_posts = g.public_posts
+        try:
+            g.public_posts = posts
+            writer = PostWriter()
+            for index, post in enumerate(posts):
+                post.relation = writer._get_relations(post, index)
+        finally:
+            g.public_posts = public_posts
+        #: older links every post, they are not saved
+        cache = BuildCache(self.directory)
+        cache.set_post(self.filepath, posts[0])
+        cache.save()
+
+        cache = BuildCache(self.directory)
+        cache.load()
+        cached, post = cache.get_post(self.filepath)
+        assert cached is True
+        assert post.title == '0'
+        assert post.relation is None
+
+    def test_save_broken(self):
+        cache = BuildCache(self.directory)
+        cache.sources['post.md'] = {'post': lambda: None}
+        try:
+            cache.save()
+        except Exception:
+            pass
+        else:
+            raise AssertionError('lambda is pickled')
+        assert os.listdir(self.directory) == ['post.md']
+
+    def test_output(self):
+        cache = BuildCache(self.directory)
+        post = Post(self.filepath, 'content', title='title', meta={})
+        signature = cache.signature('post.html', {'post': post})
+        assert signature == cache.signature('post.html', {'post': post})
+        assert signature != cache.signature('page.html', {'post': post})
+
+        cache.set_output(self.filepath, signature)
+        cache.save()
+
+        cache = BuildCache(self.directory)
+        cache.load()
+        assert cache.is_fresh(self.filepath, signature) is True
+        assert cache.is_fresh(self.filepath, 'changed') is False
+
+        cache.set_output(self.filepath, signature)
+        #: written by another writer
+        assert cache.is_fresh(self.filepath, signature) is False
+
+        #: the next build in the server
+        cache.rotate()
+        assert cache.is_fresh(self.filepath, signature) is True
+
+        memory = BuildCache(None)
+        memory.load()
+        memory.set_output(self.filepath, signature)
+        memory.rotate()
+        assert memory.is_fresh(self.filepath, signature) is True
+        #: nothing is saved
+        memory.save()
+
+        #: written by others after the build
+        os.utime(self.filepath, (1000, 1000))
+        assert memory.is_fresh(self.filepath, signature) is False
+
+
+class TestStaticCache(object):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filepath = os.path.join(self.directory, 'site.css')
+        self.write('body {}')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, content, mtime=1000):
+        f = open(self.filepath, 'w')
+        f.write(content)
+        f.close()
+        os.utime(self.filepath, (mtime, mtime))
+
+    def test_hash(self):
+        cache = StaticCache()
+        hsh = cache.hash(self.filepath)
+        assert hsh == StaticCache(method='md5').hash(self.filepath)
+        assert cache.hash(os.path.join(self.directory, 'none')) is None
+
+        #: checked once in a build
+        self.write('body {color: red}', 2000)
+        assert cache.hash(self.filepath) == hsh
+        cache.reset()
+        assert cache.hash(self.filepath) != hsh
+
+    def test_crc32(self):
+        cache = StaticCache(method='crc32')
+        assert len(cache.hash(self.filepath)) == 8
+        assert cache.hash(self.filepath) != StaticCache().hash(self.filepath)
+
+    def test_save(self):
+        cache = StaticCache(self.directory)
+        hsh = cache.hash(self.filepath)
+        cache.save()
+
+        cache = StaticCache(self.directory)
+        cache.load()
+        assert cache.records[self.filepath][3] == hsh
+
+        #: the same size and mtime, the file is not hashed again
+        cache.records[self.filepath] = (7, 1000, 'md5', 'cached')
+        assert cache.hash(self.filepath) == 'cached'
+
+    def test_merge(self):
+        worker = StaticCache()
+        hsh = worker.hash(self.filepath)
+        cache = StaticCache(self.directory)
+        cache.merge(worker.collect())
+        assert worker.collect() == {}
+        assert cache.checked == {self.filepath: hsh}
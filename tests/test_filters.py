@@ -1,6 +1,7 @@
 import os
-from liquidluck.filters import content_url, static_url
-from liquidluck.options import settings
+from liquidluck.filters import content_url, static_url, tag_url, wiki_link
+from liquidluck.options import g, settings
+from liquidluck.readers.base import Post
 ROOT = os.path.abspath(os.path.dirname(__file__))
 
 
@@ -46,6 +47,43 @@ def test_content_url():
     settings.config['relative_url'] = False
 
 
+def test_tag_url():
+    ctx = {'writer': {'filepath': 'a/b'}}
+    settings.config['permalink'] = '{{category}}/{{filename}}.html'
+    settings.site['prefix'] = ''
+    active = settings.writer.get('active')
+    try:
+        settings.writer['active'] = ['liquidluck.writers.core.TagWriter']
+        assert tag_url(ctx, 'life') == '/tag/life/'
+        settings.writer['active'].append(
+            'liquidluck.writers.core.TagCloudWriter')
+        assert tag_url(ctx, 'life') == '/tag/#life'
+    finally:
+        settings.writer['active'] = active
+
+
+def test_wiki_link():
+    ctx = {'writer': {'filepath': 'a/b'}}
+    settings.config['permalink'] = '{{filename}}.html'
+    settings.site['prefix'] = ''
+    sources = g.public_posts, g.secure_posts, g.pure_pages
+    try:
+        g.public_posts = [Post('hello.md', '', title='Hello', meta={
+            'date': '2012-12-12'})]
+        g.secure_posts = []
+        g.pure_pages = [Post(os.path.join(g.source_directory, 'me.md'), '',
+                             title='About', meta={})]
+        assert wiki_link(ctx, '[[hello]]') == '<a href="/hello.html">hello</a>'
+        assert wiki_link(ctx, '[[about|me]]') == '<a href="/me.html">me</a>'
+        assert wiki_link(ctx, '[[x]]') == '<span class="no-reference">x</span>'
+
+        #: the index follows the posts
+        g.public_posts = []
+        assert 'no-reference' in wiki_link(ctx, '[[hello]]')
+    finally:
+        g.public_posts, g.secure_posts, g.pure_pages = sources
+
+
 def test_static_url():
     path = os.path.join(ROOT, 'source')
     ctx = {'writer': {'filepath': 'a/b'}}
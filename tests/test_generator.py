@@ -1,7 +1,12 @@
 #!/usr/bin/env python
 
 import os.path
-from liquidluck.generator import load_settings, load_posts
+import shutil
+import tempfile
+from liquidluck.generator import load_settings, load_posts, update_posts
+from liquidluck.readers.base import BaseReader
+from liquidluck.readers.markdown import MarkdownReader
+from liquidluck.readers.restructuredtext import RestructuredTextReader
 
 ROOT = os.path.abspath(os.path.dirname(__file__))
 
@@ -18,3 +23,135 @@ def test_load_posts():
     load_posts(os.path.join(ROOT, 'source/post'))
     from liquidluck.options import g
     assert len(g.public_posts) > 0
+
+
+def test_update_posts():
+    from liquidluck.options import g
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'post')
+    shutil.copytree(os.path.join(ROOT, 'source/post'), path)
+    source = g.source_directory
+    lists = g.public_posts, g.secure_posts, g.pure_files, g.pure_pages
+    try:
+        g.public_posts, g.secure_posts, g.pure_files, g.pure_pages = \
+            [], [], [], []
+        load_posts(path)
+        titles = set(o.title for o in g.public_posts)
+        pages = len(g.pure_pages)
+        files = len(g.pure_files)
+        untouched = [o for o in g.public_posts
+                     if not o.filepath.endswith('demo-markdown-1.md')]
+
+        f = open(os.path.join(path, 'new-post.md'), 'w')
+        f.write('# New Post\n\n- date: 2013-01-01\n\n---------\n\nhello')
+        f.close()
+        os.remove(os.path.join(path, 'demo-markdown-1.md'))
+        shutil.rmtree(os.path.join(path, 'media'))
+        update_posts([
+            (os.path.join(directory, 'post', 'new-post.md'), 'created'),
+            (os.path.join(directory, 'post', 'demo-markdown-1.md'),
+             'deleted'),
+            (os.path.join(directory, 'post', 'media'), 'deleted'),
+        ])
+
+        assert set(o.title for o in g.public_posts) == \
+            titles - set(['demo']) | set(['New Post'])
+        assert g.public_posts[0].title == 'New Post'
+        #: the other posts are not read again
+        for post in untouched:
+            assert post in g.public_posts
+        assert len(g.pure_pages) == pages
+        assert len(g.pure_files) < files
+        assert g.taxonomy.posts is g.public_posts
+    finally:
+        g.public_posts, g.secure_posts, g.pure_files, g.pure_pages = lists
+        g.source_directory = source
+        shutil.rmtree(directory)
+
+
+def test_parse_files():
+    from liquidluck.utils import walk_dir
+    from liquidluck.generator import parse_files
+
+    filepaths = sorted(walk_dir(os.path.join(ROOT, 'source/post')))
+    serial = parse_files(filepaths)
+    parallel = parse_files(filepaths, 2)
+    assert len(serial) == len(parallel)
+    for a, b in zip(serial, parallel):
+        if a is None:
+            assert b is None
+        else:
+            assert a.title == b.title
+            assert a.content == b.content
+            assert a.meta == b.meta
+
+
+def test_parse_files_without_fork():
+    from liquidluck.utils import walk_dir
+    from liquidluck.generator import parse_files
+
+    filepaths = sorted(walk_dir(os.path.join(ROOT, 'source/post')))
+    fork = os.fork
+    try:
+        #: like windows, the pool would spawn processes without readers
+        del os.fork
+        posts = parse_files(filepaths, 2)
+    finally:
+        os.fork = fork
+    assert [o is None for o in posts] == \
+        [o is None for o in parse_files(filepaths)]
+    assert any(posts)
+
+
+class TextReader(BaseReader):
+    SUPPORT_TYPE = 'txt'
+
+
+class RstTxtReader(BaseReader):
+    SUPPORT_TYPE = 'rst.txt'
+
+
+class DraftReader(BaseReader):
+    def support(self):
+        return 'draft' in self.filepath
+
+
+def test_find_reader():
+    from liquidluck.options import settings
+    from liquidluck.generator import load_readers, find_reader
+
+    active = settings.reader.get('active')
+    try:
+        settings.reader['active'] = [
+            'liquidluck.readers.markdown.MarkdownReader',
+            'liquidluck.readers.restructuredtext.RestructuredTextReader',
+        ]
+        load_readers()
+        assert isinstance(find_reader('a/b.md'), MarkdownReader)
+        assert isinstance(find_reader('a.b.markdown'), MarkdownReader)
+        assert isinstance(find_reader('b.rst.txt'), RestructuredTextReader)
+        assert find_reader('b.txt') is None
+        assert find_reader('b.png') is None
+        assert find_reader('md') is None
+
+        settings.reader['active'] = [
+            'test_generator.TextReader',
+            'test_generator.RstTxtReader',
+        ]
+        load_readers()
+        assert isinstance(find_reader('x/foo.rst.txt'), TextReader)
+
+        settings.reader['active'] = [
+            'test_generator.DraftReader',
+            'test_generator.TextReader',
+            'liquidluck.readers.restructuredtext.RestructuredTextReader',
+        ]
+        load_readers()
+        assert isinstance(find_reader('b.rst.txt'), TextReader)
+        assert isinstance(find_reader('b.rst'), RestructuredTextReader)
+        assert isinstance(find_reader('draft.rst'), DraftReader)
+        assert find_reader('b.md') is None
+    finally:
+        settings.reader['active'] = active
+        load_readers()
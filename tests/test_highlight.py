@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+
+import os
+import time
+import shutil
+import tempfile
+from pygments.lexers import get_lexer_by_name
+from liquidluck.options import g
+from liquidluck.highlight import HighlightCache
+from liquidluck.readers.markdown import markdown
+
+
+class TestHighlightCache(object):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = HighlightCache(self.directory)
+
+    def tearDown(self):
+        g.highlight_cache = None
+        shutil.rmtree(self.directory)
+
+    def test_key(self):
+        lexer = get_lexer_by_name('python')
+        key = self.cache.key(u'print 1', lexer, {})
+        assert key == self.cache.key(u'print 1', lexer, {})
+        assert key != self.cache.key(u'print 2', lexer, {})
+        assert key != self.cache.key(u'print 1', lexer, {'linenos': True})
+        assert key != self.cache.key(
+            u'print 1', get_lexer_by_name('ruby'), {})
+
+    def test_highlight(self):
+        lexer = get_lexer_by_name('python')
+        calls = []
+
+        def func():
+            calls.append(1)
+            return u'<pre>print 1</pre>'
+
+        assert self.cache.highlight(u'print 1', lexer, {}, func) == func()
+        assert self.cache.highlight(u'print 1', lexer, {}, func) == func()
+        assert len(calls) == 3
+
+    def test_evict(self):
+        for i in range(4):
+            self.cache.set('%032d' % i, u'x' * 100)
+            path = self.cache.path('%032d' % i)
+            os.utime(path, (time.time() - 100 + i, time.time() - 100 + i))
+        #: used recently
+        self.cache.get('%032d' % 0)
+
+        self.cache.limit = 250
+        assert self.cache.evict() == 2
+        assert self.cache.get('%032d' % 0) is not None
+        assert self.cache.get('%032d' % 1) is None
+        assert self.cache.get('%032d' % 2) is None
+        assert self.cache.get('%032d' % 3) is not None
+
+    def test_markdown(self):
+        text = u'```python\nprint 1\n```\n'
+        html = markdown(text)
+        g.highlight_cache = self.cache
+        assert markdown(text) == html
+        assert os.listdir(self.directory)
+        assert markdown(text) == html
@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+
+from liquidluck.profiler import Profiler, profile
+from liquidluck.options import g
+
+
+class TestProfiler(object):
+    def test_record(self):
+        profiler = Profiler()
+        profiler.record('stage', 'parse', 1.0, 0.5)
+        profiler.record('stage', 'parse', 1.0, 0.5)
+        profiler.record('stage', 'walk', 0.1, 0.1)
+        items = profiler.items('stage')
+        assert [o['name'] for o in items] == ['parse', 'walk']
+        assert items[0]['count'] == 2
+        assert items[0]['wall'] == 2.0
+
+    def test_merge(self):
+        profiler = Profiler()
+        profiler.record('template', 'post.html', 1.0, 0.5)
+        child = Profiler()
+        child.record('template', 'post.html', 1.0, 0.5)
+        child.record('template', 'archive.html', 3.0, 0.5)
+        profiler.merge(child.collect())
+        assert child.records == {}
+
+        items = profiler.items('template')
+        assert [o['name'] for o in items] == ['archive.html', 'post.html']
+        assert items[1]['count'] == 2
+        assert 'archive.html' in profiler.summary()
+
+    def test_profile(self):
+        with profile('stage', 'disabled'):
+            pass
+
+        g.profiler = Profiler()
+        with profile('stage', 'enabled'):
+            pass
+        assert g.profiler.items('stage')[0]['name'] == 'enabled'
+        g.profiler = None
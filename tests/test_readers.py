@@ -1,9 +1,11 @@
 #!/usr/bin/env python
 
 import os.path
+import pickle
 import datetime
-from liquidluck.readers.base import BaseReader, Post
-from liquidluck.readers.markdown import MarkdownReader
+from liquidluck.options import settings
+from liquidluck.readers.base import BaseReader, Post, LazyContent
+from liquidluck.readers.markdown import MarkdownReader, parse_meta, markdown
 from liquidluck.readers.restructuredtext import RestructuredTextReader
 
 ROOT = os.path.abspath(os.path.dirname(__file__))
@@ -54,6 +56,45 @@ class TestPost(object):
         assert hasattr(post, 'topic') is True
         assert getattr(post, 'topic') == 'getattr'
 
+    def test_memo(self):
+        post = Post('filepath', 'content', title='a.b', meta=self.meta)
+        assert post.date is post.date
+        assert post.tags is post.tags
+        assert post.author is post.author
+        assert post.clean_title == 'a-b'
+
+        post.meta['date'] = '2013-01-01'
+        post.meta['tags'] = 'life'
+        post.meta['author'] = 'kitty'
+        post.title = 'c'
+        assert post.date.year == 2013
+        assert post.tags == ['life']
+        assert str(post.author) == 'kitty'
+        assert post.clean_title == 'c'
+
+    def test_attributes(self):
+        post = Post('filepath', 'content', title='title', meta=self.meta)
+        assert post.relation is None
+        post.topic = 'slots'
+        assert post.topic == 'slots'
+        assert 'topic' not in post.meta
+
+    def test_pickle(self):
+        post = Post('filepath', 'content', title='title', meta=self.meta)
+        post.topic = 'pickle'
+        post.date
+        post.relation = {'newer': post, 'older': None, 'related': []}
+        post.related_priority = 1
+        for protocol in (0, pickle.HIGHEST_PROTOCOL):
+            copy = pickle.loads(pickle.dumps(post, protocol))
+            assert copy.title == 'title'
+            assert copy.content == 'content'
+            assert copy.topic == 'pickle'
+            assert copy._date is None
+            assert copy.date == post.date
+            assert copy.relation is None
+            assert copy.related_priority is None
+
 
 class TestBaseReade(object):
     def test_support(self):
@@ -89,6 +130,73 @@ class TestMarkdownReader(object):
         assert 'highlight' in self.post.content
 
 
+class TestLazyContent(object):
+    def setUp(self):
+        path = os.path.join(ROOT, 'source/post/demo-markdown-1.md')
+        self.reader = MarkdownReader(path)
+        self.post = self.reader.render()
+        settings.reader['vars'] = {'lazy_content': True}
+
+    def tearDown(self):
+        settings.reader['vars'] = {}
+
+    def test_content(self):
+        post = self.reader.render()
+        assert isinstance(post._content, LazyContent)
+        assert post.title == self.post.title
+        assert post.content == self.post.content
+        assert post.toc == self.post.toc
+
+    def test_toc(self):
+        post = self.reader.render()
+        assert post.toc == self.post.toc
+        assert not isinstance(post._content, LazyContent)
+
+    def test_pickle(self):
+        post = pickle.loads(pickle.dumps(self.reader.render()))
+        assert isinstance(post._content, LazyContent)
+        assert post.content == self.post.content
+
+
+def test_markdown_reuse():
+    text = u'## hello\n\nfoo[^1]\n\n[^1]: bar\n'
+    first = markdown(text)
+    second = markdown(text)
+    assert first == second
+    assert second.toc_html.count('<li>') == 1
+
+
+class TestMarkdownMeta(object):
+    def setUp(self):
+        self.reader = MarkdownReader('filename.md')
+
+    def assert_same(self, header):
+        parsed = parse_meta(header)
+        assert parsed is not None
+        assert parsed == self.reader._parse_meta_with_markdown(header)
+
+    def test_simple(self):
+        self.assert_same(u'# demo\n\n- date: 2012-12-12\n- tags: a, b\n')
+        self.assert_same(u'\n# demo #\n- category: work\n\n\n')
+        self.assert_same(u'# demo\r\n\r\n* date: 2012-12-12\r\n+ tags:\r\n')
+        self.assert_same(u'# demo\n')
+
+    def test_fallback(self):
+        assert parse_meta(u'# *demo*\n\n- date: 2012-12-12\n') is None
+        assert parse_meta(u'# demo\n\n- date: 2012\n\n- tags: a\n') is None
+        assert parse_meta(u'# demo\n\n- summary: a\n  b\n') is None
+        assert parse_meta(u'demo\n====\n\n- date: 2012-12-12\n') is None
+        assert parse_meta(u'- date: 2012-12-12\n') is None
+
+    def test_meta(self):
+        header = u'# demo\n\n- date: 2012-12-12\n- tags: a, b\n'
+        meta = self.reader._parse_meta(header, u'body')
+        assert meta['title'] == 'demo'
+        assert meta['date'] == '2012-12-12'
+        assert meta['tags'] == 'a, b'
+        assert meta['source_text'] == 'body'
+
+
 class TestRestructuredTextReader(object):
     def setUp(self):
         path = os.path.join(ROOT, 'source/post/demo-rst-1.rst')
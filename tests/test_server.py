@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import tempfile
+import threading
+from wsgiref.simple_server import make_server
+from liquidluck.tools import server
+from liquidluck.tools.server import wsgi_app, _is_not_modified, _parse_range
+from liquidluck.tools.server import SendfileRequestHandler
+try:
+    from urllib2 import urlopen, Request
+except ImportError:
+    from urllib.request import urlopen, Request
+
+
+def test_is_not_modified():
+    assert _is_not_modified('"a"', None, '"a"') is True
+    assert _is_not_modified('"b", W/"a"', None, '"a"') is True
+    assert _is_not_modified('*', None, '"a"') is True
+    assert _is_not_modified('"b"', None, '"a"') is False
+
+    since = 'Sat, 29 Oct 1994 19:43:31 GMT'
+    assert _is_not_modified(None, since, '"a"', 783459811) is True
+    assert _is_not_modified(None, since, '"a"', 783459812) is False
+    assert _is_not_modified(None, 'broken', '"a"', 783459811) is False
+    #: If-None-Match wins
+    assert _is_not_modified('"b"', since, '"a"', 783459811) is False
+
+
+def test_parse_range():
+    assert _parse_range(None, 10) is None
+    assert _parse_range('bytes=0-4', 10) == (0, 4)
+    assert _parse_range('bytes=5-', 10) == (5, 9)
+    assert _parse_range('bytes=5-100', 10) == (5, 9)
+    assert _parse_range('bytes=-3', 10) == (7, 9)
+    assert _parse_range('bytes=-30', 10) == (0, 9)
+    assert _parse_range('bytes=10-', 10) is False
+    assert _parse_range('bytes=-0', 10) is False
+    assert _parse_range('bytes=0-1,3-4', 10) is None
+    assert _parse_range('bytes=4-1', 10) is None
+    assert _parse_range('bytes=a-', 10) is None
+    assert _parse_range('items=0-1', 10) is None
+
+
+class TestWsgiApp(object):
+    def setUp(self):
+        self.root = server.ROOT
+        self.directory = tempfile.mkdtemp()
+        server.config(root=self.directory)
+        f = open(os.path.join(self.directory, 'site.css'), 'w')
+        f.write('body {}')
+        f.close()
+
+    def tearDown(self):
+        server.ROOT = self.root
+        shutil.rmtree(self.directory)
+
+    def request(self, path, **environ):
+        response = {}
+
+        def start_response(status, headers):
+            response['status'] = status
+            response['headers'] = dict(headers)
+
+        environ['PATH_INFO'] = path
+        body = b''.join(wsgi_app(environ, start_response))
+        return response['status'], response['headers'], body
+
+    def test_conditional_get(self):
+        status, headers, body = self.request('/site.css')
+        assert status == '200 OK'
+        assert body == b'body {}'
+        assert headers['Cache-Control'] == 'no-cache'
+        assert 'Last-Modified' in headers
+
+        status, _, body = self.request(
+            '/site.css', HTTP_IF_NONE_MATCH=headers['Etag'])
+        assert status == '304 Not Modified'
+        assert body == b''
+
+        status, _, body = self.request(
+            '/site.css', HTTP_IF_MODIFIED_SINCE=headers['Last-Modified'])
+        assert status == '304 Not Modified'
+
+        status, _, _ = self.request('/site.css', HTTP_IF_NONE_MATCH='"a"')
+        assert status == '200 OK'
+
+    def test_not_found(self):
+        status, headers, body = self.request('/none.css')
+        assert status == '404 Not Found'
+
+    def test_range(self):
+        status, headers, body = self.request(
+            '/site.css', HTTP_RANGE='bytes=2-')
+        assert status == '206 Partial Content'
+        assert headers['Content-Range'] == 'bytes 2-6/7'
+        assert headers['Content-Length'] == '5'
+        assert body == b'dy {}'
+
+        status, headers, body = self.request(
+            '/site.css', HTTP_RANGE='bytes=9-')
+        assert status == '416 Requested Range Not Satisfiable'
+        assert headers['Content-Range'] == 'bytes */7'
+
+        #: the file is changed, send the whole file
+        status, headers, body = self.request(
+            '/site.css', HTTP_RANGE='bytes=2-', HTTP_IF_RANGE='"a"')
+        assert status == '200 OK'
+        assert body == b'body {}'
+
+    def test_server(self):
+        httpd = make_server('127.0.0.1', 0, wsgi_app,
+                            handler_class=SendfileRequestHandler)
+        thread = threading.Thread(target=httpd.handle_request)
+        thread.start()
+        url = 'http://127.0.0.1:%d/site.css' % httpd.server_port
+        try:
+            response = urlopen(Request(url, headers={'Range': 'bytes=0-3'}))
+            assert response.read() == b'body'
+        finally:
+            thread.join()
+            httpd.server_close()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+
+from liquidluck.options import g
+from liquidluck.readers.base import Post
+from liquidluck.taxonomy import Taxonomy, get_taxonomy
+from liquidluck.taxonomy import WikiIndex, get_wiki_index
+
+
+def create_post(title, date, **meta):
+    meta['date'] = date
+    return Post('%s.md' % title, '', title=title, meta=meta)
+
+
+def test_taxonomy():
+    posts = [
+        create_post('c', '2013-01-02', tags='a, b', category='work'),
+        create_post('b', '2012-12-02', tags='b', author='kitty'),
+        create_post('a', '2012-11-02', tags='a', category='work'),
+    ]
+    taxonomy = Taxonomy(posts)
+    assert taxonomy.years == {2013: posts[:1], 2012: posts[1:]}
+    assert taxonomy.months[(2012, 12)] == [posts[1]]
+    assert taxonomy.tags == {'a': [posts[0], posts[2]], 'b': posts[:2]}
+    assert taxonomy.categories == {'work': [posts[0], posts[2]]}
+    assert taxonomy.authors['kitty'] == [posts[1]]
+
+
+def test_get_taxonomy():
+    public_posts = g.public_posts
+    try:
+        g.public_posts = [create_post('a', '2012-11-02', tags='a')]
+        taxonomy = get_taxonomy()
+        assert taxonomy is get_taxonomy()
+        assert taxonomy.tags == {'a': g.public_posts}
+
+        g.public_posts = []
+        assert get_taxonomy().tags == {}
+    finally:
+        g.public_posts = public_posts
+
+
+def test_wiki_index():
+    posts = [
+        create_post('Hello World', '2013-01-02', alias='hi, greeting'),
+        create_post('hello world', '2012-12-02'),
+    ]
+    page = Post('about-me.md', '', title='About', meta={})
+    secure = create_post('About', '2012-11-02')
+    index = WikiIndex(posts, [secure], [page])
+    assert index.find('Hello World') is posts[0]
+    assert index.find('hello world') is posts[1]
+    assert index.find('HELLO   world') is posts[0]
+    assert index.find('Greeting') is posts[0]
+    assert index.find('about') is page
+    assert index.find('About-Me') is page
+    assert index.find('missing') is None
+
+
+def test_get_wiki_index():
+    public_posts = g.public_posts
+    try:
+        g.public_posts = [create_post('a', '2012-11-02')]
+        index = get_wiki_index()
+        assert index is get_wiki_index()
+        assert index.find('a') is g.public_posts[0]
+
+        g.public_posts = []
+        assert get_wiki_index().find('a') is None
+    finally:
+        g.public_posts = public_posts
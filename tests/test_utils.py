@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+
+import datetime
+from nose.tools import raises
+from liquidluck.utils import to_datetime
+
+
+def test_to_datetime():
+    assert to_datetime(None) is None
+    assert to_datetime('2012-12-12') == datetime.datetime(2012, 12, 12)
+    assert to_datetime('2012-1-2') == datetime.datetime(2012, 1, 2)
+    assert to_datetime('20121212') == datetime.datetime(2012, 12, 12)
+    assert to_datetime('2012-12-12 10:11') == \
+        datetime.datetime(2012, 12, 12, 10, 11)
+    assert to_datetime('2012-12-12T10:11') == \
+        datetime.datetime(2012, 12, 12, 10, 11)
+    assert to_datetime('2012-12-12 10:11:12') == \
+        datetime.datetime(2012, 12, 12, 10, 11, 12)
+    assert to_datetime('20121212 10:11:12') == \
+        datetime.datetime(2012, 12, 12, 10, 11, 12)
+    assert to_datetime('Wed Dec 12 10:11:12 2012') == \
+        datetime.datetime(2012, 12, 12, 10, 11, 12)
+    #: strptime allows spaces
+    assert to_datetime('2012-12-12  10:11') == \
+        datetime.datetime(2012, 12, 12, 10, 11)
+
+
+@raises(ValueError)
+def test_to_datetime_error():
+    to_datetime('2012-12-12T10:11:12')
+
+
+@raises(ValueError)
+def test_to_datetime_invalid():
+    to_datetime('2012-13-12')
+
+
+@raises(ValueError)
+def test_to_datetime_newline():
+    #: strptime does not allow a trailing newline
+    to_datetime('2012-12-12\n')
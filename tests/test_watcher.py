@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import tempfile
+from nose.plugins.skip import SkipTest
+from liquidluck.tools.watcher import PollingWatcher, InotifyWatcher
+from liquidluck.tools.watcher import ChangeSet
+
+
+def test_changeset():
+    changes = ChangeSet(delay=1, timeout=5)
+    assert changes.deadline() is None
+
+    changes.add([('a', 'created'), ('b', 'modified')], now=10)
+    changes.add([('a', 'modified'), ('c', 'deleted')], now=10.5)
+    assert changes.deadline() == 11.5
+    assert not changes.is_ready(now=11)
+    assert changes.is_ready(now=12)
+
+    changes.add([('b', 'deleted'), ('c', 'created')], now=14.8)
+    #: a burst is not delayed over the timeout
+    assert changes.deadline() == 15
+    assert changes.pop() == [
+        ('a', 'created'), ('b', 'deleted'), ('c', 'modified'),
+    ]
+    assert changes.deadline() is None
+
+    changes.add([('a', 'created')], now=20)
+    changes.add([('a', 'deleted')], now=20)
+    assert changes.pop() == []
+
+
+class TestWatcher(object):
+    watcher_class = PollingWatcher
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.write('a.md')
+        self.watcher = self.create_watcher()
+
+    def tearDown(self):
+        self.watcher.close()
+        shutil.rmtree(self.directory)
+
+    def create_watcher(self):
+        return self.watcher_class(
+            [self.directory], lambda path: not path.endswith('.swp')
+        )
+
+    def write(self, name, mtime=None):
+        path = os.path.join(self.directory, name)
+        folder = os.path.dirname(path)
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+        f = open(path, 'w')
+        f.write(name)
+        f.close()
+        if mtime:
+            os.utime(path, (mtime, mtime))
+        return path
+
+    def changes(self):
+        changes = ChangeSet()
+        changes.add(self.watcher.changes())
+        return changes.pop()
+
+    def test_changes(self):
+        assert self.changes() == []
+
+        a = self.write('a.md', 1000)
+        b = self.write('b.md')
+        self.write('.b.md.swp')
+        assert self.changes() == [(a, 'modified'), (b, 'created')]
+
+        os.remove(b)
+        assert self.changes() == [(b, 'deleted')]
+
+    def test_directory(self):
+        c = self.write('c/c.md')
+        assert (c, 'created') in self.changes()
+
+
+class TestInotifyWatcher(TestWatcher):
+    watcher_class = InotifyWatcher
+
+    def create_watcher(self):
+        try:
+            return TestWatcher.create_watcher(self)
+        except OSError:
+            raise SkipTest('inotify is not available')
@@ -4,8 +4,8 @@ import os
 import datetime
 from liquidluck.writers.base import Pagination
 from liquidluck.writers.base import get_post_slug
-from liquidluck.writers.base import load_jinja
-from liquidluck.options import settings
+from liquidluck.writers.base import load_jinja, render_jobs, MemoryOutput
+from liquidluck.options import settings, g
 
 ROOT = os.path.abspath(os.path.dirname(__file__))
 
@@ -63,5 +63,100 @@ def test_get_post_slug():
     assert get_post_slug(post, slug_format) == 'blog/life/demo.html'
 
 
+def test_post_slug_memo():
+    from liquidluck.readers.base import Post
+    from liquidluck.writers.base import compile_slug_format
+
+    parts = compile_slug_format('{{date.year}}/{{filename}}.html')
+    assert parts == ['', ('date', 'year'), '/', ('filename', ), '.html']
+
+    meta = {'date': '2012-12-12', 'category': 'life'}
+    post = Post('demo.md', '', title='demo', meta=meta)
+    settings.site['prefix'] = ''
+    slug_format = '{{category}}/{{date.month}}/{{filename}}.html'
+    assert get_post_slug(post, slug_format) == 'life/12/demo.html'
+    assert post._slug[1] == 'life/12/demo.html'
+
+    post._slug = (post._slug[0], 'cached.html')
+    assert get_post_slug(post, slug_format) == 'cached.html'
+    assert get_post_slug(post, '{{filename}}/') == 'demo/'
+    settings.site['prefix'] = 'blog'
+    assert get_post_slug(post, '{{filename}}/') == 'blog/demo/'
+    settings.site['prefix'] = ''
+
+
 def test_load_jinja():
     load_jinja()
+
+
+def test_bytecode_cache():
+    import shutil
+    import tempfile
+    directory = tempfile.mkdtemp()
+    settings.config['template_cache'] = directory
+    try:
+        jinja = load_jinja()
+        jinja.get_template('post.html')
+        assert os.listdir(directory)
+        settings.config['template_cache'] = False
+        assert load_jinja().bytecode_cache is None
+    finally:
+        settings.config.pop('template_cache')
+        shutil.rmtree(directory)
+
+
+def test_render_jobs():
+    from liquidluck.writers.core import ArchiveWriter
+    writer = ArchiveWriter()
+    g.render_queue = []
+    writer.start()
+    jobs = g.render_queue
+    assert len(jobs) > 0
+
+    destination = jobs[0][3]
+    if os.path.exists(destination):
+        os.remove(destination)
+    render_jobs(jobs, 2)
+    assert g.render_queue is None
+    assert os.path.exists(destination)
+
+
+def test_memory_output():
+    from liquidluck.writers.core import ArchiveWriter
+    writer = ArchiveWriter()
+    g.memory = MemoryOutput()
+    try:
+        writer.start()
+        destination = os.path.join(g.output_directory, 'index.html')
+        assert destination in g.memory
+        assert destination not in g.memory.pages
+
+        content = g.memory.get(destination)
+        assert b'</html>' in content
+        assert g.memory.get(os.path.join(g.output_directory, 'none')) is None
+
+        #: rendered again when the signature changes
+        g.memory.jobs[destination] = g.memory.jobs[destination][:3] + ('a',)
+        g.memory.get(destination)
+        g.memory.pages[destination] = ('a', b'cached')
+        assert g.memory.get(destination) == b'cached'
+
+        g.memory.reset()
+        g.memory.prune()
+        assert g.memory.pages == {}
+    finally:
+        g.memory = None
+
+
+def test_write_unchanged():
+    from liquidluck.writers.base import BaseWriter
+    settings.config['skip_unchanged'] = True
+    writer = BaseWriter()
+    destination = os.path.join(ROOT, 'build', 'unchanged.html')
+    if os.path.exists(destination):
+        os.remove(destination)
+    assert writer.write('content', destination) is True
+    assert writer.write('content', destination) is False
+    assert writer.write('changed', destination) is True
+    settings.config['skip_unchanged'] = False
+    assert writer.write('changed', destination) is True
@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 
 import os
+import pickle
 from liquidluck.writers.extends import PostWriter
 from liquidluck.options import g
 
@@ -15,3 +16,40 @@ class TestPostWriter(object):
         assert relation['newer'] is None
         assert relation['older'] is not None
         assert relation['related'] is not None
+
+    def test_related(self):
+        from liquidluck.readers.base import Post
+
+        def create_post(title, tags):
+            meta = {'tags': tags, 'date': '2012-12-12'}
+            return Post(title, '', title=title, meta=meta)
+
+        posts = [
+            create_post('a', 'x, y'),
+            create_post('b', 'x'),
+            create_post('c', 'x, y, z'),
+            create_post('d', 'z'),
+            create_post('e', 'y'),
+            create_post('f', 'x, y'),
+            create_post('a', 'x, y'),
+        ]
+        public_posts = g.public_posts
+        try:
+            g.public_posts = posts
+            related = PostWriter()._get_related(posts[0])
+            assert [o.post for o in related] == \
+                [posts[2], posts[5], posts[1], posts[4]]
+            assert [o.related_priority for o in related] == [2, 2, 1, 1]
+            assert related[0].title == 'c'
+
+            copy = pickle.loads(pickle.dumps(related[0], 2))
+            assert copy.title == 'c'
+            assert copy.related_priority == 2
+
+            related = PostWriter()._get_related(posts[3])
+            assert [o.post for o in related] == [posts[2]]
+            assert related[0].related_priority == 1
+            #: the shared post is not changed
+            assert posts[2].related_priority is None
+        finally:
+            g.public_posts = public_posts